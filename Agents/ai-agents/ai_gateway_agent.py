@@ -7,20 +7,63 @@ import os
 import json
 import asyncio
 import aiohttp
-from typing import Dict, List, Optional, Any
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from datetime import datetime
 from dotenv import load_dotenv
 
+from gateway_batcher import gateway_batcher
+from gateway_limiter import GatewayError, estimate_request_tokens, gateway_limiter, parse_retry_after
+from gateway_router import EndpointRouter, endpoints_from_env, router_for
+from gateway_session import gateway_sessions
+from prompt_builder import PromptBuilder
+from response_cache import request_key, response_cache
+
 # Load environment variables
 load_dotenv('/mnt/f/DevOps/.env')
+if os.getenv('AI_GATEWAY_CACHE_DB'):
+    response_cache.configure(db_path=os.getenv('AI_GATEWAY_CACHE_DB'))
+
+
+async def iter_sse_data(content: Any) -> AsyncIterator[str]:
+    """Yield the data of each server-sent event as its lines arrive"""
+    data = []
+    async for raw in content:
+        line = raw.decode('utf-8').rstrip('\r\n')
+        if not line:
+            # A blank line dispatches the event
+            if data:
+                yield '\n'.join(data)
+                data = []
+            continue
+        if line.startswith(':'):
+            continue
+        field, _, value = line.partition(':')
+        if field == 'data':
+            data.append(value[1:] if value.startswith(' ') else value)
+    if data:
+        yield '\n'.join(data)
+
 
 class AIGatewayAgent:
     """AI Agent that interacts with AI Gateway API"""
     
     def __init__(self, agent_name: str = "AI Assistant"):
         self.api_key = os.getenv('AI_GATEWAY_API_KEY')
-        self.base_url = "https://api.ai-gateway.com/v1"  # Update with actual URL
+        # One URL, or several (AI_GATEWAY_ENDPOINTS=url1,url2) routed by live latency and errors
+        self.endpoints = endpoints_from_env(
+            os.getenv('AI_GATEWAY_ENDPOINTS'),
+            os.getenv('AI_GATEWAY_BASE_URL', "https://api.ai-gateway.com/v1")  # Update with actual URL
+        )
+        self.hedge = False            # duplicate slow requests to a second endpoint
         self.agent_name = agent_name
+        self.model = "gpt-4"  # or your preferred model
+        self.temperature = 0.7
+        self.max_tokens = 2000
+        self.context_window = 8192   # model limit shared by the prompt and the reply
+        self.prompt_builder = PromptBuilder()
+        self.response_cache = response_cache
+        self.limiter = gateway_limiter
+        self.batcher = gateway_batcher
         self.session = None
         self.conversation_history = []
         
@@ -28,8 +71,8 @@ class AIGatewayAgent:
             raise ValueError("AI_GATEWAY_API_KEY not found in environment variables")
     
     async def __aenter__(self):
-        """Async context manager entry"""
-        self.session = aiohttp.ClientSession(
+        """Async context manager entry - borrows a session on the shared connection pool"""
+        self.session = gateway_sessions.session(
             headers={
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json"
@@ -38,68 +81,184 @@ class AIGatewayAgent:
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
+        """Async context manager exit - returns the session; pooled connections stay open"""
         if self.session:
-            await self.session.close()
+            await gateway_sessions.release(self.session)
+            self.session = None
+    
+    def get_connection_stats(self) -> Dict:
+        """Connection reuse across every gateway agent in this process"""
+        return gateway_sessions.get_stats()
     
-    async def chat(self, message: str, context: Optional[Dict] = None) -> str:
-        """Send a message to the AI and get response"""
+    @property
+    def base_url(self) -> str:
+        """The preferred endpoint; setting it replaces the endpoint pool with that one URL"""
+        return self.endpoints[0]
+    
+    @base_url.setter
+    def base_url(self, url: str):
+        self.endpoints = [url]
+    
+    def _router(self) -> EndpointRouter:
+        return router_for(self.endpoints)
+    
+    def get_routing_stats(self) -> Dict:
+        """Latency, error rate and circuit state of each endpoint, shared across agents"""
+        return self._router().get_stats()
+    
+    def get_rate_limit_stats(self) -> Dict:
+        """Throttling, retries and the adaptive concurrency limit shared by every gateway agent"""
+        return self.limiter.get_stats()
+    
+    async def chat(self, message: str, context: Optional[Dict] = None,
+                   temperature: Optional[float] = None, use_cache: Optional[bool] = None,
+                   hedge: Optional[bool] = None, history: bool = True) -> str:
+        """Send a message to the AI and get response
+        
+        Deterministic requests (temperature 0) are answered from the response
+        cache when an identical one was seen before; use_cache=False always
+        asks the gateway, use_cache=True caches even sampled replies.
+        history=False sends the message without the conversation and leaves
+        it unchanged, so identical one-shot requests share a cache key. hedge
+        (default: the agent's hedge setting) duplicates a request that is
+        slower than its endpoint's p95 to the next best endpoint.
+        """
         try:
-            payload = {
-                "model": "gpt-4",  # or your preferred model
-                "messages": self._build_messages(message, context),
-                "temperature": 0.7,
-                "max_tokens": 2000
-            }
-            
-            async with self.session.post(
-                f"{self.base_url}/chat/completions",
-                json=payload
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    reply = data['choices'][0]['message']['content']
+            payload = self._build_payload(message, context, temperature, history)
+            key, hit, reply = self._lookup_cache(payload, use_cache)
+            if hit:
+                if history:
                     self._update_history(message, reply)
-                    return reply
-                else:
-                    error = await response.text()
-                    return f"Error: {response.status} - {error}"
-                    
+                return reply
+            
+            if self.batcher.enabled:
+                # Rides in a batch with other agents' concurrent requests
+                data = await self.batcher.submit(self.session, self._router(), payload)
+            else:
+                # Throttled, retried on 429/5xx, and sharing one concurrency limit with every agent;
+                # each attempt goes to the endpoint that currently looks fastest
+                router = self._router()
+                hedged = self.hedge if hedge is None else hedge
+                data = await self.limiter.run(
+                    lambda: router.run(lambda url: self._post(payload, url), hedge=hedged),
+                    estimate_request_tokens(payload),
+                    usage=lambda data: (data.get('usage') or {}).get('total_tokens')
+                )
+            reply = data['choices'][0]['message']['content']
+            if key:
+                self.response_cache.put(key, reply)
+            if history:
+                self._update_history(message, reply)
+            return reply
+        
+        except GatewayError as e:
+            return f"Error: {e.status} - {e.body}"
         except Exception as e:
             return f"Exception occurred: {str(e)}"
     
-    def _build_messages(self, message: str, context: Optional[Dict]) -> List[Dict]:
-        """Build message history for API request"""
-        messages = [
-            {"role": "system", "content": f"You are {self.agent_name}, a helpful AI assistant."}
-        ]
+    async def chat_stream(self, message: str, context: Optional[Dict] = None,
+                          temperature: Optional[float] = None,
+                          use_cache: Optional[bool] = None, history: bool = True) -> AsyncIterator[str]:
+        """Send a message and yield the reply's text deltas as the gateway generates them
+        
+        History is updated once the stream completes; a consumer that stops
+        early leaves it unchanged. Gateway errors raise GatewayError instead of
+        being returned as text, so they cannot be mistaken for output. A cached
+        reply is yielded as a single delta. history=False works as for chat().
+        """
+        payload = self._build_payload(message, context, temperature, history)
+        key, hit, reply = self._lookup_cache(payload, use_cache)
+        if hit:
+            yield reply
+            if history:
+                self._update_history(message, reply)
+            return
+        
+        async def open_at(base_url: str) -> aiohttp.ClientResponse:
+            response = await self.session.post(
+                f"{base_url}/chat/completions",
+                json={**payload, "stream": True},
+                headers={"Accept": "text/event-stream"}
+            )
+            if response.status != 200:
+                async with response:
+                    raise GatewayError(response.status, await response.text(),
+                                       parse_retry_after(response.headers.get('Retry-After')))
+            return response
         
-        # Add conversation history (last 5 exchanges)
-        for item in self.conversation_history[-10:]:
-            messages.append(item)
+        async def open_stream() -> aiohttp.ClientResponse:
+            return await self._router().run(open_at)
         
-        # Add context if provided
-        if context:
-            messages.append({
-                "role": "system",
-                "content": f"Context: {json.dumps(context)}"
-            })
+        parts = []
+        async with self.limiter.hold(open_stream, estimate_request_tokens(payload)) as response:
+            async with response:
+                async for data in iter_sse_data(response.content):
+                    if data == '[DONE]':
+                        break
+                    choices = json.loads(data).get('choices') or []
+                    delta = (choices[0].get('delta') or {}).get('content') if choices else None
+                    if delta:
+                        parts.append(delta)
+                        yield delta
         
-        # Add current message
-        messages.append({"role": "user", "content": message})
+        reply = ''.join(parts)
+        if key:
+            self.response_cache.put(key, reply)
+        if history:
+            self._update_history(message, reply)
+    
+    async def _post(self, payload: Dict, base_url: str) -> Dict:
+        async with self.session.post(f"{base_url}/chat/completions", json=payload) as response:
+            if response.status != 200:
+                raise GatewayError(response.status, await response.text(),
+                                   parse_retry_after(response.headers.get('Retry-After')))
+            return await response.json()
+    
+    def _build_payload(self, message: str, context: Optional[Dict], temperature: Optional[float],
+                       history: bool = True) -> Dict:
+        return {
+            "model": self.model,
+            "messages": self._build_messages(message, context, history),
+            "temperature": self.temperature if temperature is None else temperature,
+            "max_tokens": self.max_tokens
+        }
+    
+    def _lookup_cache(self, payload: Dict, use_cache: Optional[bool]) -> Tuple[Optional[str], bool, Optional[str]]:
+        """(key, hit, reply); key is None when this request is not cacheable"""
+        if not self.response_cache or not self.response_cache.should_cache(payload['temperature'], use_cache):
+            return None, False, None
+        key = request_key(payload['model'], payload['messages'], payload['temperature'], payload['max_tokens'])
+        hit, reply = self.response_cache.get(key)
+        return key, hit, reply
+    
+    def _build_messages(self, message: str, context: Optional[Dict], history: bool = True) -> List[Dict]:
+        """Build message history for API request
         
-        return messages
+        Whatever the reply does not reserve of the context window is filled by
+        priority - system prompt, current message, context, then the newest
+        history turns - and the rest is truncated or left out.
+        """
+        return self.prompt_builder.build(
+            f"You are {self.agent_name}, a helpful AI assistant.",
+            message,
+            context=context,
+            history=self.conversation_history if history else None,
+            budget=self.context_window - self.max_tokens,
+            summary=history
+        )
     
     def _update_history(self, user_message: str, ai_response: str):
         """Update conversation history"""
         self.conversation_history.append({"role": "user", "content": user_message})
         self.conversation_history.append({"role": "assistant", "content": ai_response})
         
-        # Keep only last 20 messages
+        # Keep only last 20 messages; older turns live on in the prompt summary
         if len(self.conversation_history) > 20:
+            self.prompt_builder.roll_up(self.conversation_history[:-20])
             self.conversation_history = self.conversation_history[-20:]
     
-    async def analyze_code(self, code: str, language: str = "python") -> Dict:
+    async def analyze_code(self, code: str, language: str = "python", use_cache: Optional[bool] = None,
+                           temperature: Optional[float] = None, history: bool = True) -> Dict:
         """Analyze code for improvements and issues"""
         prompt = f"""
         Analyze the following {language} code:
@@ -117,15 +276,29 @@ class AIGatewayAgent:
         Format as JSON.
         """
         
-        response = await self.chat(prompt)
+        response = await self.chat(prompt, temperature=temperature, use_cache=use_cache, history=history)
         try:
             return json.loads(response)
         except:
             return {"analysis": response}
     
-    async def generate_script(self, task_description: str, language: str = "bash") -> str:
+    async def generate_script(self, task_description: str, language: str = "bash",
+                              use_cache: Optional[bool] = None,
+                              temperature: Optional[float] = None, history: bool = True) -> str:
         """Generate a script based on task description"""
-        prompt = f"""
+        prompt = self._script_prompt(task_description, language)
+        return await self.chat(prompt, temperature=temperature, use_cache=use_cache, history=history)
+    
+    async def generate_script_stream(self, task_description: str, language: str = "bash",
+                                     use_cache: Optional[bool] = None,
+                                     temperature: Optional[float] = None, history: bool = True) -> AsyncIterator[str]:
+        """Stream a generated script as it is written"""
+        prompt = self._script_prompt(task_description, language)
+        async for delta in self.chat_stream(prompt, temperature=temperature, use_cache=use_cache, history=history):
+            yield delta
+    
+    def _script_prompt(self, task_description: str, language: str) -> str:
+        return f"""
         Create a {language} script for the following task:
         {task_description}
         
@@ -136,12 +309,20 @@ class AIGatewayAgent:
         
         Return only the script code.
         """
-        
-        return await self.chat(prompt)
     
     async def troubleshoot(self, error_message: str, context: str = "") -> str:
         """Help troubleshoot errors"""
-        prompt = f"""
+        prompt = self._troubleshoot_prompt(error_message, context)
+        return await self.chat(prompt)
+    
+    async def troubleshoot_stream(self, error_message: str, context: str = "") -> AsyncIterator[str]:
+        """Stream troubleshooting advice as it is written"""
+        prompt = self._troubleshoot_prompt(error_message, context)
+        async for delta in self.chat_stream(prompt):
+            yield delta
+    
+    def _troubleshoot_prompt(self, error_message: str, context: str) -> str:
+        return f"""
         Help troubleshoot this error:
         
         Error: {error_message}
@@ -153,8 +334,6 @@ class AIGatewayAgent:
         2. Step-by-step solution
         3. Prevention tips
         """
-        
-        return await self.chat(prompt)
 
 
 class DevOpsAgent(AIGatewayAgent):
@@ -164,9 +343,23 @@ class DevOpsAgent(AIGatewayAgent):
         super().__init__("DevOps Agent")
         self.tasks = []
     
-    async def create_dockerfile(self, app_type: str, requirements: List[str]) -> str:
+    async def create_dockerfile(self, app_type: str, requirements: List[str],
+                                use_cache: Optional[bool] = None,
+                                temperature: Optional[float] = None, history: bool = True) -> str:
         """Generate optimized Dockerfile"""
-        prompt = f"""
+        prompt = self._dockerfile_prompt(app_type, requirements)
+        return await self.chat(prompt, temperature=temperature, use_cache=use_cache, history=history)
+    
+    async def create_dockerfile_stream(self, app_type: str, requirements: List[str],
+                                       use_cache: Optional[bool] = None,
+                                       temperature: Optional[float] = None, history: bool = True) -> AsyncIterator[str]:
+        """Stream a generated Dockerfile as it is written"""
+        prompt = self._dockerfile_prompt(app_type, requirements)
+        async for delta in self.chat_stream(prompt, temperature=temperature, use_cache=use_cache, history=history):
+            yield delta
+    
+    def _dockerfile_prompt(self, app_type: str, requirements: List[str]) -> str:
+        return f"""
         Create an optimized Dockerfile for a {app_type} application.
         Requirements: {', '.join(requirements)}
         
@@ -175,12 +368,24 @@ class DevOpsAgent(AIGatewayAgent):
         - Security best practices
         - Size optimization
         """
-        
-        return await self.chat(prompt)
     
-    async def generate_ci_cd_pipeline(self, platform: str, tech_stack: List[str]) -> str:
+    async def generate_ci_cd_pipeline(self, platform: str, tech_stack: List[str],
+                                      use_cache: Optional[bool] = None,
+                                      temperature: Optional[float] = None, history: bool = True) -> str:
         """Generate CI/CD pipeline configuration"""
-        prompt = f"""
+        prompt = self._pipeline_prompt(platform, tech_stack)
+        return await self.chat(prompt, temperature=temperature, use_cache=use_cache, hedge=True, history=history)
+    
+    async def generate_ci_cd_pipeline_stream(self, platform: str, tech_stack: List[str],
+                                             use_cache: Optional[bool] = None,
+                                             temperature: Optional[float] = None, history: bool = True) -> AsyncIterator[str]:
+        """Stream a generated CI/CD pipeline as it is written"""
+        prompt = self._pipeline_prompt(platform, tech_stack)
+        async for delta in self.chat_stream(prompt, temperature=temperature, use_cache=use_cache, history=history):
+            yield delta
+    
+    def _pipeline_prompt(self, platform: str, tech_stack: List[str]) -> str:
+        return f"""
         Create a {platform} CI/CD pipeline for:
         Tech stack: {', '.join(tech_stack)}
         
@@ -190,10 +395,9 @@ class DevOpsAgent(AIGatewayAgent):
         - Security scanning
         - Deployment stage
         """
-        
-        return await self.chat(prompt)
     
-    async def optimize_infrastructure(self, current_config: Dict) -> Dict:
+    async def optimize_infrastructure(self, current_config: Dict, use_cache: Optional[bool] = None,
+                                      temperature: Optional[float] = None, history: bool = True) -> Dict:
         """Suggest infrastructure optimizations"""
         prompt = f"""
         Analyze and optimize this infrastructure configuration:
@@ -208,7 +412,7 @@ class DevOpsAgent(AIGatewayAgent):
         Return as JSON with specific recommendations.
         """
         
-        response = await self.chat(prompt)
+        response = await self.chat(prompt, temperature=temperature, use_cache=use_cache, hedge=True, history=history)
         try:
             return json.loads(response)
         except:
@@ -253,6 +457,9 @@ def process_data(data):
             ["Python", "PostgreSQL", "Docker", "Kubernetes"]
         )
         print(f"CI/CD Pipeline:\n{pipeline}\n")
+        print(f"Connection reuse: {json.dumps(devops.get_connection_stats(), indent=2)}")
+    
+    await gateway_sessions.close()
 
 
 if __name__ == "__main__":
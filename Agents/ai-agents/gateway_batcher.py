@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Gateway Batcher - Opt-in micro-batching of concurrent chat completion requests
+
+Requests that arrive within a short window (or until the batch is full) are
+sent together to the gateway's batch endpoint as one HTTP request and one
+rate-limit slot, and each response is routed back to the caller awaiting it:
+
+    POST {base_url}/chat/completions/batch   {"requests": [payload, ...]}
+    ->  {"responses": [{"status": 200, "body": {...}} | {"status": 429, "error": "..."}, ...]}
+
+A gateway without that endpoint (404/405) is remembered, and its batches are
+sent as concurrent requests pipelined over the shared keep-alive pool instead.
+Items that fail with a retryable status rejoin a later batch after a backoff.
+Batches to a pool of endpoints go through its EndpointRouter, so every attempt
+feeds the endpoints' health and a retry can fail over to another endpoint.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Union
+
+import aiohttp
+
+from gateway_limiter import GatewayError, estimate_request_tokens, gateway_limiter, parse_retry_after
+from gateway_router import EndpointRouter, router_for
+
+
+class _Item:
+    __slots__ = ('payload', 'session', 'future', 'attempts')
+
+    def __init__(self, payload: Dict, session: aiohttp.ClientSession, future: asyncio.Future):
+        self.payload = payload
+        self.session = session
+        self.future = future
+        self.attempts = 0
+
+
+class _Queue:
+    """Items waiting for one endpoint pool and credential, and the timer that will flush them"""
+
+    __slots__ = ('items', 'timer')
+
+    def __init__(self):
+        self.items = []
+        self.timer = None
+
+
+class RequestBatcher:
+    """Collects concurrent requests per gateway and flushes them as batches"""
+
+    def __init__(self, enabled: bool = False, window: float = 0.02, max_batch: int = 16,
+                 limiter: Any = None):
+        self.enabled = enabled
+        self.window = window          # seconds the first request of a batch waits for company
+        self.max_batch = max_batch
+        self.limiter = limiter or gateway_limiter
+        self._queues = {}             # (router, authorization) -> _Queue
+        self._batch_supported = {}    # base_url -> bool, learned from the first batch
+        self._flushes = set()
+        self.stats = {'requests': 0, 'batches': 0, 'batched_requests': 0, 'pipelined_requests': 0,
+                      'requeued': 0, 'largest_batch': 0}
+
+    def configure(self, **settings):
+        unknown = set(settings) - {'enabled', 'window', 'max_batch'}
+        if unknown:
+            raise TypeError(f"Unknown batcher settings: {', '.join(sorted(unknown))}")
+        for name, value in settings.items():
+            setattr(self, name, value)
+
+    async def submit(self, session: aiohttp.ClientSession, endpoints: Union[str, EndpointRouter],
+                     payload: Dict) -> Dict:
+        """Queue one completion request for a base URL or endpoint router and wait for its response body"""
+        router = endpoints if isinstance(endpoints, EndpointRouter) else router_for([endpoints])
+        future = asyncio.get_running_loop().create_future()
+        self.stats['requests'] += 1
+        self._enqueue((router, session.headers.get('Authorization')), _Item(payload, session, future))
+        return await future
+
+    def _enqueue(self, key: tuple, item: _Item):
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = _Queue()
+        queue.items.append(item)
+        if len(queue.items) >= self.max_batch:
+            self._flush(key)
+        elif queue.timer is None:
+            queue.timer = asyncio.get_running_loop().call_later(self.window, self._flush, key)
+
+    def _flush(self, key: tuple):
+        queue = self._queues.pop(key, None)
+        if queue is None:
+            return
+        if queue.timer is not None:
+            queue.timer.cancel()
+        items = [item for item in queue.items if not item.future.done()]   # callers may have given up
+        if items:
+            task = asyncio.get_running_loop().create_task(self._send(key, items))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _send(self, key: tuple, items: List[_Item]):
+        router = key[0]
+        try:
+            if self._batch_supported.get(router.best_url(), True):
+                responses = await self._send_batch(router, items)
+                if responses is None:
+                    await self._send_pipelined(router, items)
+                    return
+                for item, response in zip(items, responses):
+                    self._deliver(key, item, response)
+            else:
+                await self._send_pipelined(router, items)
+        except BaseException as e:
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+
+    async def _send_batch(self, router: EndpointRouter, items: List[_Item]) -> Optional[List[Dict]]:
+        """One request for the whole batch; None if the chosen endpoint has no batch endpoint"""
+        async def post(base_url: str) -> Optional[List[Dict]]:
+            async with items[0].session.post(f"{base_url}/chat/completions/batch",
+                                             json={"requests": [item.payload for item in items]}) as response:
+                self._batch_supported[base_url] = response.status not in (404, 405)
+                if response.status in (404, 405):
+                    return None
+                if response.status != 200:
+                    raise GatewayError(response.status, await response.text(),
+                                       parse_retry_after(response.headers.get('Retry-After')))
+                data = await response.json()
+                return data['responses']
+
+        def usage(responses: Optional[List[Dict]]) -> Optional[int]:
+            if not responses:
+                return None
+            return sum(((r.get('body') or {}).get('usage') or {}).get('total_tokens') or 0 for r in responses)
+
+        tokens = sum(estimate_request_tokens(item.payload) for item in items)
+        responses = await self.limiter.run(lambda: router.run(post), tokens, usage=usage)
+        if responses is not None:
+            if len(responses) != len(items):
+                raise GatewayError(502, f"batch returned {len(responses)} responses for {len(items)} requests")
+            self.stats['batches'] += 1
+            self.stats['batched_requests'] += len(items)
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], len(items))
+        return responses
+
+    async def _send_pipelined(self, router: EndpointRouter, items: List[_Item]):
+        """Fallback: every request at once over the shared keep-alive connections"""
+        async def one(item: _Item):
+            async def post(base_url: str) -> Dict:
+                async with item.session.post(f"{base_url}/chat/completions", json=item.payload) as response:
+                    if response.status != 200:
+                        raise GatewayError(response.status, await response.text(),
+                                           parse_retry_after(response.headers.get('Retry-After')))
+                    return await response.json()
+
+            try:
+                body = await self.limiter.run(lambda: router.run(post), estimate_request_tokens(item.payload),
+                                              usage=lambda data: (data.get('usage') or {}).get('total_tokens'))
+            except Exception as e:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            else:
+                if not item.future.done():
+                    item.future.set_result(body)
+
+        self.stats['pipelined_requests'] += len(items)
+        await asyncio.gather(*(one(item) for item in items))
+
+    def _deliver(self, key: tuple, item: _Item, response: Dict):
+        if item.future.done():
+            return
+        status = response.get('status', 200)
+        if status == 200:
+            item.future.set_result(response.get('body') or {})
+            return
+        error = GatewayError(status, str(response.get('error', '')))
+        if error.retryable and item.attempts < self.limiter.max_retries:
+            self.stats['requeued'] += 1
+            delay = self.limiter.backoff(item.attempts, error)
+            item.attempts += 1
+            asyncio.get_running_loop().call_later(delay, self._enqueue, key, item)
+        else:
+            item.future.set_exception(error)
+
+    def get_stats(self) -> Dict:
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'enabled': self.enabled,
+            'mean_batch': self.stats['batched_requests'] / batches if batches else 0.0,
+            'batch_endpoints': dict(self._batch_supported)
+        }
+
+
+# Shared by every gateway agent in the process; off until configure(enabled=True)
+gateway_batcher = RequestBatcher()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Gateway Limiter - Shared client-side rate limiting, adaptive concurrency and retries
+
+Every gateway request passes through one process-wide limiter:
+- token buckets for requests per minute and tokens per minute, so bursts are
+  smoothed to the provider's quota instead of being rejected by it
+- an AIMD concurrency limit: each healthy response while the limit is in
+  use raises it by 1/limit (about one slot per round of requests); a 429,
+  5xx or over-target latency halves it, once per round - failures of
+  requests sent before the last decrease do not count again
+- retries of 429/5xx and connection errors with full-jitter exponential
+  backoff; a Retry-After header pauses every caller until it has passed
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+import aiohttp
+
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class GatewayError(Exception):
+    """Non-200 response from the gateway"""
+
+    def __init__(self, status: int, body: str, retry_after: Optional[float] = None):
+        super().__init__(f"{status} - {body}")
+        self.status = status
+        self.body = body
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status in RETRYABLE_STATUSES or self.status >= 500
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_request_tokens(payload: Dict) -> int:
+    """Rough tokens a chat request can consume: ~4 characters per prompt token plus max_tokens"""
+    prompt = sum(len(str(message.get('content', ''))) for message in payload.get('messages', []))
+    return prompt // 4 + 4 * len(payload.get('messages', [])) + int(payload.get('max_tokens') or 0)
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding up to one minute of allowance"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._refunded = None      # asyncio.Event, set when adjust() gives allowance back
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def take(self, amount: float) -> float:
+        """Wait until amount is available and take it; returns seconds waited"""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            self._refill()
+            if self.level >= amount:
+                self.level -= amount
+                return waited
+            delay = (amount - self.level) / self.rate
+            if self._refunded is None:
+                self._refunded = asyncio.Event()
+            self._refunded.clear()
+            started = time.monotonic()
+            try:
+                await asyncio.wait_for(self._refunded.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            waited += time.monotonic() - started
+
+    def adjust(self, amount: float):
+        """Give back (positive) or charge (negative) once actual usage is known"""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+        if amount > 0 and self._refunded is not None:
+            self._refunded.set()
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on requests in flight"""
+
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 64, decrease_ratio: float = 0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_ratio = decrease_ratio
+        self.in_flight = 0
+        self._waiters = deque()
+        self._last_decrease = 0.0
+
+    async def acquire(self):
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    self._wake()      # pass the wake-up on
+                raise
+        self.in_flight += 1
+
+    def release(self, overloaded: Optional[bool], started: float = 0.0):
+        """overloaded True shrinks the limit, False grows it, None (client errors) leaves it
+
+        started is when the request was sent (monotonic clock).
+        """
+        saturated = self.in_flight >= int(self.limit)
+        self.in_flight -= 1
+        if overloaded:
+            if started >= self._last_decrease:
+                self.limit = max(float(self.minimum), self.limit * self.decrease_ratio)
+                self._last_decrease = time.monotonic()
+        elif overloaded is False and saturated:
+            self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+        self._wake()
+
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+class GatewayLimiter:
+    """Rate limits, adaptive concurrency and retry policy shared by all gateway agents"""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 initial_concurrency: int = 8, min_concurrency: int = 1, max_concurrency: int = 64,
+                 latency_target: Optional[float] = None, max_retries: int = 4,
+                 base_delay: float = 0.5, max_delay: float = 30.0):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.concurrency = AdaptiveConcurrency(initial_concurrency, min_concurrency, max_concurrency)
+        self.latency_target = latency_target    # seconds; slower responses count as overload
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._resume_at = 0.0
+        self.stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'server_errors': 0,
+                      'connection_errors': 0, 'wait_seconds': 0.0}
+
+    def configure(self, requests_per_minute: Any = False, tokens_per_minute: Any = False, **settings):
+        """Change limits in place; a per-minute rate of None removes that bucket"""
+        if requests_per_minute is not False:
+            self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        if tokens_per_minute is not False:
+            self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        limits = {'initial_concurrency': 'limit', 'min_concurrency': 'minimum', 'max_concurrency': 'maximum'}
+        for name, value in settings.items():
+            if name in limits:
+                setattr(self.concurrency, limits[name], float(value) if name == 'initial_concurrency' else value)
+            elif name in ('latency_target', 'max_retries', 'base_delay', 'max_delay'):
+                setattr(self, name, value)
+            else:
+                raise TypeError(f"Unknown gateway limiter setting: {name}")
+        self.concurrency._wake()
+
+    async def acquire(self, tokens: int = 0):
+        """Wait for any Retry-After pause, a concurrency slot and both buckets"""
+        started = time.monotonic()
+        while self._resume_at > time.monotonic():
+            await asyncio.sleep(self._resume_at - time.monotonic())
+        await self.concurrency.acquire()
+        try:
+            if self.requests:
+                await self.requests.take(1)
+            if self.tokens and tokens:
+                await self.tokens.take(tokens)
+        except BaseException:
+            self.concurrency.release(None)
+            raise
+        self.stats['requests'] += 1
+        self.stats['wait_seconds'] += time.monotonic() - started
+
+    def release(self, latency: float, error: Optional[BaseException] = None,
+                reserved_tokens: int = 0, used_tokens: Optional[int] = None, started: Optional[float] = None):
+        """Free the slot, feed the outcome to AIMD and settle the token reservation"""
+        if error is None:
+            overloaded = self.latency_target is not None and latency > self.latency_target
+        elif isinstance(error, GatewayError):
+            overloaded = True if error.retryable else None
+            if error.status == 429:
+                self.stats['throttled'] += 1
+            elif error.status >= 500:
+                self.stats['server_errors'] += 1
+            if error.retry_after:
+                self._resume_at = max(self._resume_at, time.monotonic() + error.retry_after)
+        else:
+            overloaded = True
+            self.stats['connection_errors'] += 1
+        self.concurrency.release(overloaded, started if started is not None else time.monotonic() - latency)
+
+        if self.tokens and reserved_tokens and used_tokens is not None:
+            self.tokens.adjust(reserved_tokens - used_tokens)
+
+    def should_retry(self, error: BaseException, attempt: int) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        if isinstance(error, GatewayError):
+            return error.retryable
+        return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        """Full-jitter exponential delay, never shorter than the server's Retry-After"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after:
+            delay = max(delay, retry_after + random.uniform(0, self.base_delay))
+        return delay
+
+    async def _attempt(self, request: Callable[[], Awaitable[Any]], tokens: int) -> Tuple[Any, float]:
+        """Call request() under the limits until it succeeds or fails for good; the slot stays held"""
+        attempt = 0
+        while True:
+            await self.acquire(tokens)
+            started = time.monotonic()
+            try:
+                return await request(), started
+            except (GatewayError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # A failed attempt used none of its reservation; the retry reserves again
+                self.release(time.monotonic() - started, e, reserved_tokens=tokens, used_tokens=0)
+                if not self.should_retry(e, attempt):
+                    raise
+                self.stats['retries'] += 1
+                await asyncio.sleep(self.backoff(attempt, e))
+                attempt += 1
+            except BaseException:
+                self.concurrency.release(None)
+                raise
+
+    async def run(self, request: Callable[[], Awaitable[Any]], tokens: int = 0,
+                  usage: Optional[Callable[[Any], Optional[int]]] = None) -> Any:
+        """Call request() under the limits, retrying retryable failures
+
+        usage maps a result to the tokens it actually consumed, so the
+        tokens-per-minute reservation can be corrected.
+        """
+        result, started = await self._attempt(request, tokens)
+        self.release(time.monotonic() - started, None, tokens, usage(result) if usage else None)
+        return result
+
+    @asynccontextmanager
+    async def hold(self, request: Callable[[], Awaitable[Any]], tokens: int = 0) -> AsyncIterator[Any]:
+        """Like run(), but the slot is held until the block exits - for streamed responses
+
+        Only opening the response is retried; latency is measured to its headers.
+        """
+        result, started = await self._attempt(request, tokens)
+        latency = time.monotonic() - started
+        error = None
+        try:
+            yield result
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = e
+            raise
+        finally:
+            self.release(latency, error, started=started)
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'concurrency_limit': round(self.concurrency.limit, 2),
+            'in_flight': self.concurrency.in_flight,
+            'paused_for': max(self._resume_at - time.monotonic(), 0.0)
+        }
+
+
+# The process-wide limiter every gateway agent shares
+gateway_limiter = GatewayLimiter()
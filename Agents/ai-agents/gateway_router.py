@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Gateway Router - Latency-aware routing, circuit breaking and hedging across gateway endpoints
+
+Each endpoint keeps an EWMA of its latency and error rate. Requests go to the
+healthy endpoint with the lowest expected latency, weighted by its error rate
+and the requests it already has in flight. An endpoint that keeps failing is
+taken out of rotation (circuit open) and later probed with a single request
+(half-open) before it is trusted again; one that fails before it has ever
+answered is treated like a failed probe.
+
+A hedged request is duplicated to the next best endpoint if the first has
+not answered within that endpoint's recent p95 latency. The first success
+wins and the other request is cancelled, which trims the slow tail at the
+cost of a few percent extra requests.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+
+import aiohttp
+
+from gateway_limiter import GatewayError
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+
+def is_endpoint_failure(error: BaseException) -> bool:
+    """Errors that say something about the endpoint, as opposed to the request"""
+    if isinstance(error, GatewayError):
+        return error.retryable
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+class Endpoint:
+    """Live health of one gateway base URL"""
+
+    def __init__(self, url: str, alpha: float, window: int):
+        self.url = url.rstrip('/')
+        self.alpha = alpha
+        self.latency = None                 # EWMA seconds of successful requests
+        self.error_rate = 0.0               # EWMA of failures
+        self.samples = deque(maxlen=window)
+        self.in_flight = 0
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.stats = {'requests': 0, 'failures': 0, 'hedges': 0, 'hedge_wins': 0, 'trips': 0}
+
+    def score(self) -> float:
+        """Expected seconds to an answer; untried endpoints score 0 so they get tried"""
+        if self.latency is None:
+            return 0.0
+        return self.latency * (1 + self.in_flight) / max(1.0 - self.error_rate, 0.05)
+
+    def p95(self) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[round((len(ordered) - 1) * 0.95)]
+
+    def record(self, latency: float, failed: bool):
+        self.error_rate += self.alpha * ((1.0 if failed else 0.0) - self.error_rate)
+        if not failed:
+            self.latency = latency if self.latency is None else self.latency + self.alpha * (latency - self.latency)
+            self.samples.append(latency)
+
+    def describe(self) -> Dict:
+        return {
+            **self.stats,
+            'state': self.state,
+            'latency_ewma': round(self.latency, 4) if self.latency is not None else None,
+            'error_rate': round(self.error_rate, 4),
+            'p95': self.p95(),
+            'in_flight': self.in_flight
+        }
+
+
+class EndpointRouter:
+    """Chooses an endpoint per request and hedges slow ones"""
+
+    def __init__(self, urls: Sequence[str], alpha: float = 0.2, window: int = 200,
+                 failure_threshold: int = 5, open_seconds: float = 30.0,
+                 hedge_min_samples: int = 20, hedge_min_delay: float = 0.05):
+        if not urls:
+            raise ValueError("EndpointRouter needs at least one endpoint")
+        self.endpoints = [Endpoint(url, alpha, window) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+
+    def _available(self, endpoint: Endpoint, now: float) -> bool:
+        if endpoint.state == CLOSED:
+            return True
+        if endpoint.state == OPEN and now - endpoint.opened_at >= self.open_seconds:
+            endpoint.state = HALF_OPEN
+        # Half-open lets exactly one probe through at a time
+        return endpoint.state == HALF_OPEN and not endpoint.probing
+
+    def choose(self, exclude: Iterable[Endpoint] = ()) -> Optional[Endpoint]:
+        """Best available endpoint; if every circuit is open, the one that opened first"""
+        excluded = set(exclude)
+        now = time.monotonic()
+        candidates = [e for e in self.endpoints if e not in excluded and self._available(e, now)]
+        probes = [e for e in candidates if e.state == HALF_OPEN]
+        if probes:
+            return probes[0]
+        if candidates:
+            return min(candidates, key=lambda e: (e.score(), e.in_flight))
+        if excluded:
+            return None
+        return min(self.endpoints, key=lambda e: e.opened_at)
+
+    def best_url(self) -> str:
+        return self.choose().url
+
+    def hedge_delay(self, endpoint: Endpoint) -> Optional[float]:
+        """The endpoint's p95 latency once it has enough samples to say"""
+        if len(endpoint.samples) < self.hedge_min_samples:
+            return None
+        return max(endpoint.p95(), self.hedge_min_delay)
+
+    def _begin(self, endpoint: Endpoint):
+        endpoint.in_flight += 1
+        endpoint.stats['requests'] += 1
+        if endpoint.state == HALF_OPEN:
+            endpoint.probing = True
+
+    def _finish(self, endpoint: Endpoint, latency: float, error: Optional[BaseException]):
+        endpoint.in_flight -= 1
+        endpoint.probing = False
+        if isinstance(error, asyncio.CancelledError):
+            return          # a hedge loser says nothing about its endpoint
+        failed = error is not None and is_endpoint_failure(error)
+        endpoint.record(latency, failed)
+        if failed:
+            endpoint.stats['failures'] += 1
+            endpoint.consecutive_failures += 1
+            # A failed probe, or a failure before the endpoint ever answered, reopens at once
+            if (endpoint.state == HALF_OPEN or endpoint.latency is None
+                    or endpoint.consecutive_failures >= self.failure_threshold):
+                if endpoint.state != OPEN:
+                    endpoint.stats['trips'] += 1
+                endpoint.state = OPEN
+                endpoint.opened_at = time.monotonic()
+        else:
+            endpoint.consecutive_failures = 0
+            endpoint.state = CLOSED
+
+    async def _attempt(self, endpoint: Endpoint, request: Callable[[str], Awaitable[Any]]) -> Any:
+        self._begin(endpoint)
+        started = time.monotonic()
+        try:
+            result = await request(endpoint.url)
+        except BaseException as e:
+            self._finish(endpoint, time.monotonic() - started, e)
+            raise
+        self._finish(endpoint, time.monotonic() - started, None)
+        return result
+
+    async def run(self, request: Callable[[str], Awaitable[Any]], hedge: bool = False) -> Any:
+        """Call request(base_url) on the best endpoint, hedging to the next best if it lags"""
+        primary = self.choose()
+        delay = self.hedge_delay(primary) if hedge and len(self.endpoints) > 1 else None
+        if delay is None:
+            return await self._attempt(primary, request)
+
+        first = asyncio.ensure_future(self._attempt(primary, request))
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        backup = self.choose(exclude=[primary])
+        if backup is None:
+            return await first
+        primary.stats['hedges'] += 1
+        second = asyncio.ensure_future(self._attempt(backup, request))
+        racing = {first, second}
+        try:
+            while racing:
+                done, racing = await asyncio.wait(racing, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            backup.stats['hedge_wins'] += 1
+                        return task.result()
+                if not racing:
+                    # Both failed: report the original request's error
+                    return first.result()
+        finally:
+            for task in (first, second):
+                if not task.done():
+                    task.cancel()
+
+    def get_stats(self) -> Dict:
+        return {endpoint.url: endpoint.describe() for endpoint in self.endpoints}
+
+
+_routers = {}
+
+
+def router_for(urls: Sequence[str], **settings) -> EndpointRouter:
+    """The process-wide router for a set of endpoints, so every agent shares its health data"""
+    key = tuple(url.rstrip('/') for url in urls)
+    router = _routers.get(key)
+    if router is None:
+        router = _routers[key] = EndpointRouter(key, **settings)
+    return router
+
+
+def endpoints_from_env(value: Optional[str], default: str) -> List[str]:
+    """'https://a/v1, https://b/v1' -> list; the single default URL when unset"""
+    urls = [url.strip() for url in (value or '').split(',') if url.strip()]
+    return urls or [default]
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Gateway Session - Process-wide pooled HTTP connections for AI Gateway agents
+
+Every AIGatewayAgent borrows a lightweight ClientSession that sits on one
+shared TCPConnector per event loop, so keep-alive connections, TLS sessions
+and DNS lookups are reused across agent instances instead of being paid for
+by each one. When the last borrower on a loop returns its session the
+connector lingers for a keep-alive period before closing, so agents created
+back to back (as an agent pool does) still find warm connections.
+"""
+
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+DEFAULT_SETTINGS = {
+    'limit': 100,                 # open connections across all hosts
+    'limit_per_host': 20,
+    'keepalive_timeout': 30.0,    # seconds an idle connection stays open
+    'dns_cache_ttl': 300,
+    'total_timeout': 120.0,       # per request, seconds
+    'connect_timeout': 10.0,
+    'read_timeout': 60.0          # between received chunks
+}
+
+
+class _LoopConnector:
+    """The shared connector for one event loop and how many sessions use it"""
+
+    __slots__ = ('connector', 'borrowers', 'close_handle')
+
+    def __init__(self, connector: aiohttp.TCPConnector):
+        self.connector = connector
+        self.borrowers = 0
+        self.close_handle = None
+
+
+class GatewaySessionManager:
+    """Hands out sessions over a shared, per-loop connector and counts connection reuse"""
+
+    def __init__(self, **settings):
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.configure(**settings)
+        self._connectors = {}             # event loop -> _LoopConnector
+        self._lock = threading.Lock()
+        self.stats = {
+            'sessions': 0, 'requests': 0, 'connections_created': 0, 'connections_reused': 0,
+            'dns_cache_hits': 0, 'dns_cache_misses': 0, 'connectors_created': 0
+        }
+        self._trace = self._make_trace_config()
+
+    def configure(self, **settings):
+        """Change pool settings; connectors opened afterwards use them"""
+        unknown = set(settings) - set(DEFAULT_SETTINGS)
+        if unknown:
+            raise TypeError(f"Unknown gateway session settings: {', '.join(sorted(unknown))}")
+        self.settings.update(settings)
+
+    def _make_trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        def counter(name: str):
+            async def increment(session, context, params):
+                self.stats[name] += 1
+            return increment
+
+        trace.on_request_start.append(counter('requests'))
+        trace.on_connection_create_end.append(counter('connections_created'))
+        trace.on_connection_reuseconn.append(counter('connections_reused'))
+        trace.on_dns_cache_hit.append(counter('dns_cache_hits'))
+        trace.on_dns_cache_miss.append(counter('dns_cache_misses'))
+        return trace
+
+    def _connector_for(self, loop: asyncio.AbstractEventLoop) -> _LoopConnector:
+        with self._lock:
+            # Connectors of loops that have since closed cannot be reused (or closed cleanly)
+            for stale in [other for other in self._connectors if other.is_closed()]:
+                del self._connectors[stale]
+
+            entry = self._connectors.get(loop)
+            if entry is None or entry.connector.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self.settings['limit'],
+                    limit_per_host=self.settings['limit_per_host'],
+                    keepalive_timeout=self.settings['keepalive_timeout'],
+                    ttl_dns_cache=self.settings['dns_cache_ttl'],
+                    use_dns_cache=True
+                )
+                entry = self._connectors[loop] = _LoopConnector(connector)
+                self.stats['connectors_created'] += 1
+            return entry
+
+    def session(self, headers: Optional[Dict[str, str]] = None) -> aiohttp.ClientSession:
+        """Borrow a session on the shared connector; give it back with release()"""
+        entry = self._connector_for(asyncio.get_running_loop())
+        if entry.close_handle is not None:
+            entry.close_handle.cancel()
+            entry.close_handle = None
+        entry.borrowers += 1
+        self.stats['sessions'] += 1
+
+        timeout = aiohttp.ClientTimeout(
+            total=self.settings['total_timeout'],
+            connect=self.settings['connect_timeout'],
+            sock_read=self.settings['read_timeout']
+        )
+        return aiohttp.ClientSession(
+            connector=entry.connector,
+            connector_owner=False,
+            headers=headers,
+            timeout=timeout,
+            trace_configs=[self._trace]
+        )
+
+    async def release(self, session: aiohttp.ClientSession):
+        """Return a borrowed session; the connector outlives it by one keep-alive period"""
+        connector = session.connector      # close() detaches it
+        await session.close()
+        loop = asyncio.get_running_loop()
+        entry = self._connectors.get(loop)
+        if entry is None or entry.connector is not connector:
+            return
+        entry.borrowers = max(entry.borrowers - 1, 0)
+        if entry.borrowers == 0 and entry.close_handle is None:
+            entry.close_handle = loop.call_later(
+                self.settings['keepalive_timeout'],
+                lambda: loop.create_task(self._close_idle(loop, entry))
+            )
+
+    async def _close_idle(self, loop: asyncio.AbstractEventLoop, entry: _LoopConnector):
+        entry.close_handle = None
+        if entry.borrowers == 0:
+            with self._lock:
+                if self._connectors.get(loop) is entry:
+                    del self._connectors[loop]
+            await entry.connector.close()
+
+    async def close(self):
+        """Close this loop's connector now; call before the loop shuts down"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._connectors.pop(loop, None)
+        if entry is not None:
+            if entry.close_handle is not None:
+                entry.close_handle.cancel()
+            await entry.connector.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        opened = self.stats['connections_created'] + self.stats['connections_reused']
+        return {
+            **self.stats,
+            'reuse_rate': self.stats['connections_reused'] / opened if opened else 0.0,
+            'borrowers': sum(entry.borrowers for entry in list(self._connectors.values())),
+            'settings': dict(self.settings)
+        }
+
+
+# The process-wide manager every gateway agent borrows from
+gateway_sessions = GatewaySessionManager()
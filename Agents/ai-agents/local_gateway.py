@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Local Gateway - Offline stand-in for the AI Gateway API
+
+Speaks enough of the gateway protocol to exercise the agents without a
+network or an API key: chat completions (JSON and SSE streaming), the batch
+endpoint, and a stats endpoint. Replies echo the prompt deterministically.
+Latency, per-request overhead, a concurrency limit enforced with 429 +
+Retry-After, and random 5xx errors can be tuned to reproduce production
+behaviour.
+
+    python3 local_gateway.py --port 8089 --overhead 0.05 --max-concurrent 8
+    AI_GATEWAY_BASE_URL=http://127.0.0.1:8089/v1 AI_GATEWAY_API_KEY=local python3 ...
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from typing import Dict, Optional
+
+from aiohttp import web
+
+
+class LocalGateway:
+    """In-process aiohttp server imitating the gateway"""
+
+    def __init__(self, latency: float = 0.1, token_latency: float = 0.0, overhead: float = 0.02,
+                 max_concurrent: Optional[int] = None, error_rate: float = 0.0, batch: bool = True):
+        self.latency = latency                # model time per completion
+        self.token_latency = token_latency    # extra seconds per generated token
+        self.overhead = overhead              # per HTTP request (auth, routing, TLS bookkeeping)
+        self.max_concurrent = max_concurrent  # completions in progress before answering 429
+        self.error_rate = error_rate
+        self.batch = batch                    # serve /chat/completions/batch
+        self.active = 0
+        self.stats = {'http_requests': 0, 'completions': 0, 'batches': 0, 'largest_batch': 0,
+                      'throttled': 0, 'errors': 0, 'peak_active': 0}
+        self._runner = None
+
+    def _reply(self, payload: Dict) -> str:
+        messages = payload.get('messages') or [{}]
+        prompt = ' '.join(str(messages[-1].get('content', '')).split())
+        return f"[{payload.get('model', 'local')}] {prompt[:80]}"
+
+    def _usage(self, payload: Dict, reply: str) -> Dict:
+        prompt = sum(len(str(m.get('content', ''))) for m in payload.get('messages', [])) // 4
+        completion = len(reply) // 4
+        return {'prompt_tokens': prompt, 'completion_tokens': completion, 'total_tokens': prompt + completion}
+
+    async def _complete(self, payload: Dict) -> Dict:
+        """One completion as {'status', 'body' | 'error'}, shared by single and batch requests"""
+        if self.max_concurrent is not None and self.active >= self.max_concurrent:
+            self.stats['throttled'] += 1
+            return {'status': 429, 'error': 'rate limited', 'retry_after': 0.2}
+        if self.error_rate and random.random() < self.error_rate:
+            self.stats['errors'] += 1
+            return {'status': 503, 'error': 'upstream unavailable'}
+
+        self.active += 1
+        self.stats['peak_active'] = max(self.stats['peak_active'], self.active)
+        try:
+            reply = self._reply(payload)
+            await asyncio.sleep(self.latency + self.token_latency * (len(reply) // 4))
+        finally:
+            self.active -= 1
+        self.stats['completions'] += 1
+        return {'status': 200, 'body': {
+            'choices': [{'message': {'role': 'assistant', 'content': reply}, 'finish_reason': 'stop'}],
+            'usage': self._usage(payload, reply)
+        }}
+
+    async def _handle_completion(self, request: web.Request) -> web.StreamResponse:
+        self.stats['http_requests'] += 1
+        await asyncio.sleep(self.overhead)
+        payload = await request.json()
+        if payload.get('stream'):
+            return await self._stream(request, payload)
+
+        result = await self._complete(payload)
+        if result['status'] != 200:
+            headers = {'Retry-After': str(result['retry_after'])} if 'retry_after' in result else None
+            return web.Response(status=result['status'], text=result['error'], headers=headers)
+        return web.json_response(result['body'])
+
+    async def _stream(self, request: web.Request, payload: Dict) -> web.StreamResponse:
+        reply = self._reply(payload)
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache'})
+        await response.prepare(request)
+        words = reply.split(' ')
+        for index, word in enumerate(words):
+            await asyncio.sleep((self.latency + self.token_latency * (len(reply) // 4)) / len(words))
+            delta = word if index == 0 else ' ' + word
+            event = {'choices': [{'index': 0, 'delta': {'content': delta}}]}
+            await response.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+        await response.write(b"data: [DONE]\n\n")
+        self.stats['completions'] += 1
+        return response
+
+    async def _handle_batch(self, request: web.Request) -> web.Response:
+        if not self.batch:
+            raise web.HTTPNotFound()
+        self.stats['http_requests'] += 1
+        await asyncio.sleep(self.overhead)
+        payloads = (await request.json()).get('requests') or []
+        self.stats['batches'] += 1
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(payloads))
+        results = await asyncio.gather(*(self._complete(payload) for payload in payloads))
+        return web.json_response({'responses': [
+            {key: value for key, value in result.items() if key != 'retry_after'} for result in results
+        ]})
+
+    async def _handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/v1/chat/completions', self._handle_completion)
+        app.router.add_post('/v1/chat/completions/batch', self._handle_batch)
+        app.router.add_get('/v1/stats', self._handle_stats)
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Serve in the running loop; returns the base URL to give agents"""
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        return f"http://{host}:{bound_port}/v1"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline stand-in for the AI Gateway API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.1, help='seconds per completion')
+    parser.add_argument('--token-latency', type=float, default=0.0, help='extra seconds per generated token')
+    parser.add_argument('--overhead', type=float, default=0.02, help='seconds per HTTP request')
+    parser.add_argument('--max-concurrent', type=int, default=None, help='answer 429 beyond this many completions')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of completions failing with 503')
+    parser.add_argument('--no-batch', action='store_true', help='do not serve the batch endpoint')
+    args = parser.parse_args()
+
+    gateway = LocalGateway(args.latency, args.token_latency, args.overhead, args.max_concurrent,
+                           args.error_rate, batch=not args.no_batch)
+    print(f"🧪 Local gateway on http://{args.host}:{args.port}/v1")
+    web.run_app(gateway.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
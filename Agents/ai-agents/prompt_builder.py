@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Prompt Builder - Token-budgeted message assembly for AI Gateway agents
+
+Messages are filled by priority until the budget is spent: the system prompt
+always, then the current message, then context, then history (newest turns
+first). Whatever does not fit is truncated or dropped, so a request never
+outgrows the model window. Turns trimmed from an agent's history are rolled
+into a short running summary instead of being forgotten outright.
+
+Token counts come from a pluggable estimator - a ~4 characters per token
+heuristic by default, or tiktoken when it is installed - and are cached per
+text. Serialized context values are cached too, so re-sending the same
+history and context costs a lookup.
+"""
+
+import json
+import re
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List, Optional
+
+TRUNCATION_MARK = ' …[truncated]'
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough local estimate: about 4 characters per token for English and code"""
+    return (len(text) + 3) // 4
+
+
+def tiktoken_estimator(model: str = 'gpt-4') -> Callable[[str], int]:
+    """Exact counts with tiktoken (optional dependency)"""
+    try:
+        import tiktoken
+    except ImportError:
+        raise ImportError("tiktoken is not installed; pip install tiktoken or use the default estimator") from None
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding('cl100k_base')
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+class PromptBuilder:
+    """Assembles chat messages under a token budget, keeping a summary of trimmed turns"""
+
+    MESSAGE_OVERHEAD = 4       # role and separators per message
+
+    def __init__(self, token_budget: int = 6000, estimator: Optional[Callable[[str], int]] = None,
+                 summary_budget: int = 400, summary_line_chars: int = 160, max_cached: int = 1024):
+        self.token_budget = token_budget
+        self.estimator = estimator or estimate_tokens
+        self.summary_budget = summary_budget
+        self.summary_line_chars = summary_line_chars
+        self.max_cached = max_cached
+        self.summary_lines = deque()
+        self._counts = OrderedDict()     # text -> tokens; str caches its own hash
+        self._fragments = OrderedDict()  # (key, type, value) -> serialized fragment
+        self.stats = {'builds': 0, 'count_hits': 0, 'count_misses': 0, 'fragment_hits': 0,
+                      'truncated': 0, 'dropped_turns': 0, 'rolled_turns': 0}
+        self.last_tokens = 0
+
+    def count(self, text: str) -> int:
+        """Tokens in text, remembered for recently seen texts"""
+        tokens = self._counts.get(text)
+        if tokens is not None:
+            self._counts.move_to_end(text)
+            self.stats['count_hits'] += 1
+            return tokens
+        tokens = self.estimator(text)
+        self.stats['count_misses'] += 1
+        self._counts[text] = tokens
+        if len(self._counts) > self.max_cached:
+            self._counts.popitem(last=False)
+        return tokens
+
+    def _message_tokens(self, message: Dict) -> int:
+        return self.count(message['content']) + self.MESSAGE_OVERHEAD
+
+    def truncate(self, text: str, tokens: int) -> str:
+        """Cut text to at most tokens, keeping its beginning"""
+        if tokens <= 0:
+            return ''
+        total = self.count(text)
+        if total <= tokens:
+            return text
+        self.stats['truncated'] += 1
+        # Start from the proportional cut and shrink until the estimator agrees
+        keep = int(len(text) * tokens / total)
+        while keep > 0:
+            candidate = text[:keep] + TRUNCATION_MARK
+            if self.estimator(candidate) <= tokens:
+                return candidate
+            keep = int(keep * 0.9)
+        return ''
+
+    def context_fragments(self, context: Dict) -> List[str]:
+        """Per-key pieces that join into json.dumps(context), so keys can be dropped one at a time"""
+        return [self._fragment(key, value) for key, value in context.items()]
+
+    def _fragment(self, key: Any, value: Any) -> str:
+        # Scalar values (the large ones are strings: code, logs) are serialized once and
+        # looked up by hash; the type is part of the key so True and 1 stay apart.
+        # Containers would cost as much to hash as to serialize, so they are not cached.
+        cache_key = None
+        if isinstance(value, _SCALARS):
+            cache_key = (key, type(value), value)
+            fragment = self._fragments.get(cache_key)
+            if fragment is not None:
+                self._fragments.move_to_end(cache_key)
+                self.stats['fragment_hits'] += 1
+                return fragment
+        try:
+            fragment = f"{json.dumps(str(key))}: {json.dumps(value)}"
+        except (TypeError, ValueError):
+            fragment = f"{json.dumps(str(key))}: {json.dumps(repr(value))}"
+        if cache_key is not None:
+            self._fragments[cache_key] = fragment
+            if len(self._fragments) > self.max_cached:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def roll_up(self, turns: List[Dict]):
+        """Fold turns trimmed from history into the running summary"""
+        for turn in turns:
+            text = re.sub(r'\s+', ' ', str(turn.get('content', ''))).strip()
+            if len(text) > self.summary_line_chars:
+                text = text[:self.summary_line_chars].rstrip() + '…'
+            self.summary_lines.append(f"- {turn.get('role', 'user')}: {text}")
+            self.stats['rolled_turns'] += 1
+        # The oldest lines go first once the summary outgrows its own budget
+        while self.summary_lines and self.estimator(self.summary_text()) > self.summary_budget:
+            self.summary_lines.popleft()
+
+    def summary_text(self) -> str:
+        return "Summary of earlier conversation:\n" + '\n'.join(self.summary_lines)
+
+    def build(self, system: str, message: str, context: Optional[Dict] = None,
+              history: Optional[List[Dict]] = None, budget: Optional[int] = None,
+              summary: bool = True) -> List[Dict]:
+        """Messages in send order - system, summary, history, context, message - within budget
+
+        summary=False leaves out the running summary, for requests that stand alone.
+        """
+        self.stats['builds'] += 1
+        remaining = budget if budget is not None else self.token_budget
+
+        system_message = {"role": "system", "content": system}
+        remaining -= self._message_tokens(system_message)
+
+        content = self.truncate(message, remaining - self.MESSAGE_OVERHEAD)
+        user_message = {"role": "user", "content": content}
+        remaining -= self._message_tokens(user_message)
+
+        context_message = None
+        if context:
+            fragments = self.context_fragments(context)
+            kept = []
+            used = self.count('Context: {}') + self.MESSAGE_OVERHEAD
+            for fragment in fragments:
+                cost = self.count(fragment) + 1
+                if used + cost > remaining:
+                    break
+                kept.append(fragment)
+                used += cost
+            if len(kept) < len(fragments):
+                # A fragment that does not fit whole is cut to what is left
+                partial = self.truncate(fragments[len(kept)], remaining - used - 1)
+                if partial:
+                    kept.append(partial)
+            if kept:
+                context_message = {"role": "system", "content": "Context: {" + ', '.join(kept) + "}"}
+                remaining -= self._message_tokens(context_message)
+
+        history = history or []
+        turns = []
+        for turn in reversed(history):
+            cost = self._message_tokens(turn)
+            if cost > remaining:
+                break
+            turns.append(turn)
+            remaining -= cost
+        turns.reverse()
+        self.stats['dropped_turns'] += len(history) - len(turns)
+
+        summary_message = None
+        if summary and self.summary_lines:
+            candidate = {"role": "system", "content": self.summary_text()}
+            if self._message_tokens(candidate) <= remaining:
+                summary_message = candidate
+                remaining -= self._message_tokens(candidate)
+
+        messages = [system_message]
+        if summary_message:
+            messages.append(summary_message)
+        messages.extend(turns)
+        if context_message:
+            messages.append(context_message)
+        messages.append(user_message)
+
+        self.last_tokens = (budget if budget is not None else self.token_budget) - remaining
+        return messages
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'last_tokens': self.last_tokens, 'summary_lines': len(self.summary_lines)}
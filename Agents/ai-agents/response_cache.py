@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Response Cache - Two-tier cache of gateway chat completions
+
+Completions are keyed on the normalized request payload (model, messages,
+temperature, max_tokens). Hot entries live in an in-memory LRU; with a
+database path they are also written to SQLite, so identical prompts are
+answered across processes and restarts. By default only deterministic
+requests (temperature 0) are cached - sampled completions are meant to vary.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+_MISSING = object()
+
+
+def request_key(model: str, messages: List[Dict], temperature: float, max_tokens: int) -> str:
+    """SHA256 of the canonical payload; whitespace around message text does not matter"""
+    normalized = {
+        'model': model,
+        'messages': [[m['role'], str(m['content']).strip()] for m in messages],
+        'temperature': float(temperature),
+        'max_tokens': int(max_tokens)
+    }
+    encoded = json.dumps(normalized, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """In-memory LRU in front of an optional SQLite table with TTL and a size cap"""
+
+    def __init__(self, db_path: Optional[str] = None, max_memory_entries: int = 512,
+                 max_disk_bytes: int = 256 * 1024 * 1024, default_ttl: Optional[float] = 7 * 86400,
+                 cache_sampled: bool = False):
+        self.db_path = Path(db_path).expanduser() if db_path else None
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.default_ttl = default_ttl
+        self.cache_sampled = cache_sampled    # also cache temperature > 0 unless a call opts out
+        self._memory = OrderedDict()          # key -> (expires_at, reply)
+        self._db = None
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+                      'stores': 0, 'bypassed': 0, 'evictions': 0}
+
+    def configure(self, db_path: Optional[str] = None, **settings):
+        """Add (or move) the SQLite tier and change limits; unknown settings raise"""
+        unknown = set(settings) - {'max_memory_entries', 'max_disk_bytes', 'default_ttl', 'cache_sampled'}
+        if unknown:
+            raise TypeError(f"Unknown response cache settings: {', '.join(sorted(unknown))}")
+        for name, value in settings.items():
+            setattr(self, name, value)
+        if db_path is not None:
+            self.close()
+            self.db_path = Path(db_path).expanduser()
+
+    def should_cache(self, temperature: float, use_cache: Optional[bool]) -> bool:
+        """Explicit per-call choice wins; otherwise cache deterministic requests"""
+        if use_cache is not None:
+            cacheable = use_cache
+        else:
+            cacheable = temperature == 0 or self.cache_sampled
+        if not cacheable:
+            self.stats['bypassed'] += 1
+        return cacheable
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                ' key TEXT PRIMARY KEY, reply TEXT NOT NULL, size INTEGER NOT NULL,'
+                ' expires_at REAL, accessed_at REAL NOT NULL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)')
+            self._disk_bytes = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        return self._db
+
+    def get(self, key: str) -> Tuple[bool, Optional[str]]:
+        """Return (hit, reply); expired entries count as misses and are dropped"""
+        now = time.time()
+        entry = self._memory.get(key, _MISSING)
+
+        if entry is not _MISSING:
+            expires_at, reply = entry
+            if expires_at is None or expires_at > now:
+                self._memory.move_to_end(key)
+                self.stats['hits'] += 1
+                self.stats['memory_hits'] += 1
+                return True, reply
+            del self._memory[key]
+
+        if self.db_path:
+            with self._lock:
+                db = self._connect()
+                row = db.execute('SELECT reply, expires_at FROM responses WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    reply, expires_at = row
+                    if expires_at is None or expires_at > now:
+                        db.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+                    else:
+                        self._delete(db, key)
+                        row = None
+            if row is not None:
+                self._remember(key, expires_at, reply)
+                self.stats['hits'] += 1
+                self.stats['disk_hits'] += 1
+                return True, reply
+
+        self.stats['misses'] += 1
+        return False, None
+
+    def put(self, key: str, reply: str, ttl: Optional[float] = None):
+        """Store a reply; ttl falls back to the cache-wide default"""
+        ttl = ttl if ttl is not None else self.default_ttl
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        self._remember(key, expires_at, reply)
+        self.stats['stores'] += 1
+
+        if not self.db_path:
+            return
+        size = len(reply.encode('utf-8'))
+        with self._lock:
+            db = self._connect()
+            self._delete(db, key)
+            db.execute(
+                'INSERT INTO responses (key, reply, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                (key, reply, size, expires_at, now)
+            )
+            self._disk_bytes += size
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk(db)
+
+    def _delete(self, db: sqlite3.Connection, key: str):
+        row = db.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            db.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self._disk_bytes -= row[0]
+
+    def _remember(self, key: str, expires_at: Optional[float], reply: str):
+        self._memory[key] = (expires_at, reply)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _evict_disk(self, db: sqlite3.Connection):
+        """Drop expired rows, then least recently used ones until back under the size cap"""
+        db.execute('DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?', (time.time(),))
+        target = self.max_disk_bytes * 0.9
+        total = db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        doomed = []
+        for key, size in db.execute('SELECT key, size FROM responses ORDER BY accessed_at'):
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+        db.executemany('DELETE FROM responses WHERE key = ?', doomed)
+        self._disk_bytes = total
+        self.stats['evictions'] += len(doomed)
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        self._memory.clear()
+        if self.db_path:
+            with self._lock:
+                self._connect().execute('DELETE FROM responses')
+                self._disk_bytes = 0
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def get_stats(self) -> Dict:
+        stats = {**self.stats, 'memory_entries': len(self._memory)}
+        if self.db_path:
+            with self._lock:
+                count = self._connect().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            stats.update({'disk_entries': count, 'disk_bytes': self._disk_bytes})
+        return stats
+
+
+# Shared by every gateway agent in the process; memory only until configure(db_path=...)
+response_cache = ResponseCache()
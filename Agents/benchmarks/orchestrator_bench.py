@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Orchestrator Benchmark - Scheduling overhead and makespan on synthetic workflows
+
+Generates chain, fan-out, diamond, random-DAG and layered workflows of stub
+agents (no-op, sleep, CPU-bound, I/O-bound) and runs each case in a fresh
+process so peak RSS belongs to that case alone.
+
+    python3 orchestrator_bench.py --sizes 10,1000,100000 --output bench.json
+    python3 orchestrator_bench.py --compare baseline.json --output bench.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ORCHESTRATION_DIR = Path(__file__).resolve().parent.parent / 'orchestration'
+sys.path.insert(0, str(ORCHESTRATION_DIR))
+
+SHAPES = ('chain', 'fanout', 'diamond', 'random', 'layered')
+AGENTS = ('noop', 'sleep', 'cpu', 'io')
+MODES = ('workflow', 'tasks', 'parallel')
+SLEEP_SECONDS = 0.001
+CPU_ITERATIONS = 20000
+
+
+# Stub agents
+
+class NoopAgent:
+    async def run(self, **kwargs):
+        return None
+
+
+class SleepAgent:
+    async def run(self, seconds: float = SLEEP_SECONDS, **kwargs):
+        await asyncio.sleep(seconds)
+
+
+class CpuAgent:
+    def run(self, iterations: int = CPU_ITERATIONS, **kwargs):
+        total = 0
+        for i in range(iterations):
+            total += i * i
+        return total
+
+
+class IoAgent:
+    def run(self, seconds: float = SLEEP_SECONDS, **kwargs):
+        time.sleep(seconds)   # Blocking call, as a real file or network client would make
+
+
+STUBS = {'noop': NoopAgent, 'sleep': SleepAgent, 'cpu': CpuAgent, 'io': IoAgent}
+
+
+# Workflow shapes
+
+def build_dependencies(shape: str, size: int, seed: int = 42) -> List[List[int]]:
+    """Dependency lists (by index) for a synthetic DAG of the given shape"""
+    if shape == 'chain':
+        return [[i - 1] if i else [] for i in range(size)]
+    if shape == 'fanout':
+        # One root, size-2 independent leaves, one sink
+        if size < 3:
+            return [[] for _ in range(size)]
+        return [[]] + [[0] for _ in range(size - 2)] + [list(range(1, size - 1))]
+    if shape == 'diamond':
+        # Repeated root -> (a, b) -> join blocks
+        deps = []
+        for i in range(size):
+            position = i % 3
+            if position == 0:
+                deps.append([i - 1, i - 2] if i >= 3 else [])
+            else:
+                deps.append([i - position])
+        return deps
+    if shape == 'random':
+        rng = random.Random(seed)
+        return [rng.sample(range(i), min(i, rng.randint(0, 3))) if i else [] for i in range(size)]
+    if shape == 'layered':
+        width = max(1, int(size ** 0.5))
+        deps = []
+        for i in range(size):
+            layer_start = (i // width) * width
+            previous = range(max(0, layer_start - width), layer_start)
+            deps.append([previous[(i + k) % len(previous)] for k in range(min(3, len(previous)))] if previous else [])
+        return deps
+    raise ValueError(f"Unknown shape '{shape}'")
+
+
+def task_seconds(agent: str, cpu_seconds: float) -> float:
+    return {'noop': 0.0, 'sleep': SLEEP_SECONDS, 'cpu': cpu_seconds, 'io': SLEEP_SECONDS}[agent]
+
+
+def lower_bound(deps: List[List[int]], seconds: float, max_concurrent: int, serial: bool) -> float:
+    """Makespan no scheduler can beat: the critical path, or total work over the usable slots"""
+    depth = [0.0] * len(deps)
+    for i, parents in enumerate(deps):
+        depth[i] = seconds + max((depth[p] for p in parents), default=0.0)
+    critical_path = max(depth, default=0.0)
+    slots = 1 if serial else max_concurrent
+    return max(critical_path, seconds * len(deps) / slots)
+
+
+def calibrate_cpu() -> float:
+    agent = CpuAgent()
+    started = time.perf_counter()
+    for _ in range(20):
+        agent.run()
+    return (time.perf_counter() - started) / 20
+
+
+# Measurement
+
+class LoopLagMonitor:
+    """Samples how late a short sleep wakes up, i.e. how long the loop was blocked"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    def stop(self) -> Dict:
+        self._task.cancel()
+        if not self.samples:
+            return {'max_ms': 0.0, 'p99_ms': 0.0}
+        ordered = sorted(self.samples)
+        return {'max_ms': ordered[-1] * 1000, 'p99_ms': ordered[int((len(ordered) - 1) * 0.99)] * 1000}
+
+
+async def run_case(shape: str, size: int, agent: str, mode: str, max_concurrent: int, seed: int) -> Dict:
+    from agent_orchestrator import AgentOrchestrator
+    from workflow_plan import compile_workflow
+
+    deps = build_dependencies(shape, size, seed)
+    if mode == 'parallel':
+        deps = [[] for _ in deps]   # execute_parallel has no dependency support
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        orchestrator = AgentOrchestrator()
+        orchestrator.max_concurrent_tasks = max_concurrent
+        orchestrator.register_agent(agent, STUBS[agent])
+    params = {'iterations': CPU_ITERATIONS} if agent == 'cpu' else {}
+    workflow = {
+        'name': f"bench_{shape}_{size}",
+        'tasks': [{'id': f"t{i}", 'agent': agent, 'action': 'run', 'params': dict(params),
+                   'dependencies': [f"t{d}" for d in parents]} for i, parents in enumerate(deps)]
+    }
+
+    cpu_seconds = calibrate_cpu() if agent == 'cpu' else 0.0
+    seconds = task_seconds(agent, cpu_seconds)
+    # execute_parallel launches everything at once, so only the cpu stub (GIL-bound) is slot limited
+    slots = size if mode == 'parallel' else max_concurrent
+    bound = lower_bound(deps, seconds, slots, serial=(agent == 'cpu'))
+
+    monitor = LoopLagMonitor()
+    # Task progress printing is not what is being measured
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        monitor.start()
+        started = time.perf_counter()
+        if mode == 'workflow':
+            orchestrator.workflows[workflow['name']] = workflow
+            await orchestrator.execute_workflow(workflow['name'])
+        elif mode == 'tasks':
+            tasks = orchestrator._build_tasks(compile_workflow(workflow))
+            await orchestrator._execute_tasks(tasks, {})
+        else:
+            await orchestrator.execute_parallel(workflow['tasks'])
+        makespan = time.perf_counter() - started
+        lag = monitor.stop()
+        await orchestrator.close()
+
+    return {
+        'shape': shape,
+        'size': size,
+        'agent': agent,
+        'mode': mode,
+        'max_concurrent': max_concurrent,
+        'makespan_s': makespan,
+        'lower_bound_s': bound,
+        'efficiency': bound / makespan if makespan else None,
+        'overhead_per_task_us': max(0.0, makespan - bound) / size * 1e6,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'loop_lag': lag
+    }
+
+
+def run_isolated(case: Dict, timeout: float) -> Dict:
+    """Run one case in a child process so its peak RSS is its own"""
+    command = [sys.executable, os.path.abspath(__file__), '--case', json.dumps(case)]
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {**case, 'error': f"timed out after {timeout}s"}
+    if completed.returncode != 0:
+        return {**case, 'error': completed.stderr.strip().splitlines()[-1] if completed.stderr else 'failed'}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=ORCHESTRATION_DIR, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def case_key(result: Dict) -> tuple:
+    return (result['shape'], result['size'], result['agent'], result['mode'], result['max_concurrent'])
+
+
+def compare(previous: Dict, current: Dict):
+    """Print makespan and overhead changes against an earlier results file"""
+    before = {case_key(r): r for r in previous.get('results', []) if 'error' not in r}
+    print(f"\n📊 Compared with {previous.get('meta', {}).get('commit') or 'previous run'}")
+    for result in current['results']:
+        old = before.get(case_key(result))
+        if old is None or 'error' in result:
+            continue
+        change = (result['makespan_s'] - old['makespan_s']) / old['makespan_s'] * 100 if old['makespan_s'] else 0
+        marker = '🔴' if change > 10 else '🟢' if change < -10 else '⚪'
+        print(f"{marker} {'/'.join(str(k) for k in case_key(result)):<40} "
+              f"makespan {old['makespan_s']:.3f}s -> {result['makespan_s']:.3f}s ({change:+.1f}%), "
+              f"overhead {old['overhead_per_task_us']:.0f} -> {result['overhead_per_task_us']:.0f} us/task")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark orchestrator scheduling on synthetic DAGs")
+    parser.add_argument('--shapes', default=','.join(SHAPES))
+    parser.add_argument('--sizes', default='10,100,1000,10000')
+    parser.add_argument('--agents', default='noop,sleep')
+    parser.add_argument('--modes', default='workflow,tasks,parallel')
+    parser.add_argument('--max-concurrent', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per case; the median makespan is kept")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--timeout', type=float, default=1800, help="Seconds before a case is abandoned")
+    parser.add_argument('--output', default=None, help="Write results JSON here")
+    parser.add_argument('--compare', default=None, help="Earlier results JSON to diff against")
+    parser.add_argument('--case', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        case = json.loads(args.case)
+        print(json.dumps(asyncio.run(run_case(**case))))
+        return
+
+    for name, values, allowed in (('shape', args.shapes, SHAPES), ('agent', args.agents, AGENTS),
+                                  ('mode', args.modes, MODES)):
+        unknown = set(values.split(',')) - set(allowed)
+        if unknown:
+            parser.error(f"unknown {name}(s) {sorted(unknown)}; choose from {', '.join(allowed)}")
+
+    results = []
+    for shape in args.shapes.split(','):
+        for size in (int(s) for s in args.sizes.split(',')):
+            for agent in args.agents.split(','):
+                for mode in args.modes.split(','):
+                    case = {'shape': shape, 'size': size, 'agent': agent, 'mode': mode,
+                            'max_concurrent': args.max_concurrent, 'seed': args.seed}
+                    runs = [run_isolated(case, args.timeout) for _ in range(args.repeat)]
+                    good = [r for r in runs if 'error' not in r]
+                    result = sorted(good, key=lambda r: r['makespan_s'])[len(good) // 2] if good else runs[0]
+                    if len(good) > 1:
+                        result['makespan_stdev_s'] = statistics.stdev(r['makespan_s'] for r in good)
+                    results.append(result)
+
+                    if 'error' in result:
+                        print(f"❌ {shape:<8} {size:>7} {agent:<6} {mode:<9} {result['error']}")
+                    else:
+                        print(f"⏱️ {shape:<8} {size:>7} {agent:<6} {mode:<9} "
+                              f"makespan {result['makespan_s']:8.3f}s  bound {result['lower_bound_s']:8.3f}s  "
+                              f"overhead {result['overhead_per_task_us']:7.0f} us/task  "
+                              f"rss {result['peak_rss_mb']:6.0f} MB  lag {result['loop_lag']['max_ms']:6.1f} ms")
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Admission Control - Per-agent concurrency caps and resource-weighted budgets
+"""
+
+from collections import defaultdict
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+
+class AdmissionController:
+    """Decides whether a ready task may start given what is already running"""
+
+    def __init__(self, budgets: Optional[Dict[str, float]] = None):
+        self.budgets = dict(budgets or {})
+        self.limits = {}                      # (agent, action|None) -> {'max_concurrent', 'resources'}
+        self.in_use = defaultdict(float)      # resource -> units held by running tasks
+        self.active = defaultdict(int)        # (agent, action|None) -> running task count
+        self._held = {}                       # task -> (keys, resources) reserved at admission
+        self.running = 0                      # tasks started by every workflow sharing this controller
+        self._listeners = []
+        self.stats = {'admitted': 0, 'deferrals': 0}
+
+    def set_budget(self, resource: str, capacity: float):
+        """Cap the total weight of a resource class held by running tasks"""
+        if capacity <= 0:
+            raise ValueError(f"Budget for '{resource}' must be positive")
+        self.budgets[resource] = capacity
+
+    def set_limits(self, agent: str, action: Optional[str] = None,
+                   max_concurrent: Optional[int] = None, resources: Optional[Dict[str, float]] = None):
+        """Declare a concurrency cap and/or resource weights for an agent or one of its actions"""
+        if max_concurrent is not None and max_concurrent < 1:
+            raise ValueError(f"max_concurrent for '{agent}' must be at least 1")
+        self.limits[(agent, action)] = {
+            'max_concurrent': max_concurrent,
+            'resources': dict(resources or {})
+        }
+
+    def _requirements(self, task: Any) -> Tuple[list, Dict[str, float]]:
+        """Concurrency keys the task counts against and the resources it holds"""
+        keys = []
+        resources = {}
+        for key in ((task.agent, None), (task.agent, task.action)):
+            limits = self.limits.get(key)
+            if limits is None:
+                continue
+            keys.append(key)
+            resources.update(limits['resources'])   # Action weights override agent weights
+        return keys, resources
+
+    def constraints(self, task: Any) -> FrozenSet:
+        """Concurrency keys and resource names that can hold the task back"""
+        keys, resources = self._requirements(task)
+        return frozenset(keys) | frozenset(resources)
+
+    def try_admit(self, task: Any) -> bool:
+        """Reserve capacity for a task, or return False if it must wait"""
+        keys, resources = self._requirements(task)
+
+        for key in keys:
+            cap = self.limits[key]['max_concurrent']
+            if cap is not None and self.active[key] >= cap:
+                self.stats['deferrals'] += 1
+                return False
+
+        held = {}
+        for resource, weight in resources.items():
+            capacity = self.budgets.get(resource)
+            if capacity is not None:
+                # A task heavier than the whole budget may still run alone
+                weight = min(weight, capacity)
+                if self.in_use[resource] + weight > capacity:
+                    self.stats['deferrals'] += 1
+                    return False
+            held[resource] = weight
+
+        for key in keys:
+            self.active[key] += 1
+        for resource, weight in held.items():
+            self.in_use[resource] += weight
+        self._held[task] = (keys, held)
+        self.stats['admitted'] += 1
+        return True
+
+    def started(self, task: Any):
+        """Count a task against the task slots shared by concurrent workflows"""
+        self.running += 1
+
+    def release(self, task: Any) -> FrozenSet:
+        """Return a finished task's slot and capacity; returns the keys and resources it freed"""
+        self.running -= 1
+        keys, held = self._held.pop(task, ((), {}))
+        for key in keys:
+            self.active[key] -= 1
+        for resource, weight in held.items():
+            self.in_use[resource] -= weight
+
+        freed = frozenset(keys) | frozenset(held)
+        for listener in list(self._listeners):
+            listener(freed)
+        return freed
+
+    def add_listener(self, listener: Callable[[FrozenSet], None]):
+        """Call listener(freed) whenever any task - from any workflow - gives capacity back"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[FrozenSet], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'budgets': dict(self.budgets),
+            'in_use': {r: units for r, units in self.in_use.items() if units},
+        }
@@ -4,14 +4,32 @@ Agent Orchestrator - Coordinate multiple agents and workflows
 """
 
 import asyncio
+import copy
+import inspect
 import json
+import weakref
 import yaml
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Iterable, AsyncIterable, AsyncIterator, Union
 from datetime import datetime
 from pathlib import Path
 from enum import Enum
-import importlib.util
-import sys
+
+from workflow_scheduler import WorkflowScheduler
+from agent_pool import AgentPool
+from task_executors import TaskExecutors, validate_backend, INLINE, THREAD
+from result_cache import TaskResultCache, stable_hash
+from single_flight import SingleFlight
+from workflow_checkpoint import CheckpointStore, decode_value
+from admission_control import AdmissionController
+from duration_stats import DurationStats
+from workflow_plan import PlanCache, WorkflowPlan, compile_workflow
+from execution_history import ExecutionHistory
+from agent_registry import AgentRegistry, find_agent_class, load_module_from_path
+from worker_fleet import WorkerFleet
+from fan_out import iter_chunks, resolve_source, run_map
+from task_streams import WorkflowStreams, pump_generator
+from result_store import ResultRef, ResultStore, ResultView
+from task_tracing import TaskTracer
 
 class TaskStatus(Enum):
     PENDING = "pending"
@@ -23,14 +41,29 @@ class TaskStatus(Enum):
 class Task:
     """Represents a single task in the workflow"""
     
-    def __init__(self, task_id: str, agent: str, action: str, params: Dict = None, dependencies: List[str] = None):
+    def __init__(self, task_id: str, agent: str, action: str, params: Dict = None, dependencies: List[str] = None,
+                 execution: Optional[str] = None, cache: Any = True, map: Optional[Dict] = None,
+                 reduce: Any = None, stream: Optional[Dict] = None, reads: Optional[List[str]] = None):
         self.id = task_id
         self.agent = agent
         self.action = action
         self.params = params or {}
         self.dependencies = dependencies or []
+        self.execution = execution
+        self.cache = cache            # False disables caching, a number sets the TTL in seconds
+        self.map = map                # Fan-out options; the action then runs once per item or chunk
+        self.reduce = reduce
+        self.stream = stream          # Upstream task whose items arrive while it is still running
+        self.reads = reads            # Upstream results visible in _results; None means all
+        self.stream_reader = None     # Run-time stream plumbing, set per workflow run
+        self.output_stream = None
+        self.collect_output = True
         self.status = TaskStatus.PENDING
         self.result = None
+        self.result_hash = None
+        self.cached = False
+        self.restored = False         # Completed in an earlier attempt and restored by resume_workflow
+        self.shared = False           # Joined an identical in-flight execution instead of running
         self.error = None
         self.started_at = None
         self.completed_at = None
@@ -43,8 +76,10 @@ class Task:
             'params': self.params,
             'dependencies': self.dependencies,
             'status': self.status.value,
-            'result': self.result,
+            'result': self.result.describe() if isinstance(self.result, ResultRef) else self.result,
             'error': self.error,
+            'cached': self.cached,
+            'shared': self.shared,
             'started_at': self.started_at.isoformat() if self.started_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None
         }
@@ -53,121 +88,539 @@ class AgentOrchestrator:
     """Orchestrates multiple agents and complex workflows"""
     
     def __init__(self):
-        self.agents = {}
+        self.agents = AgentRegistry()
         self.workflows = {}
+        self.plans = {}
+        self.plan_cache = PlanCache()
         self.tasks = {}
-        self.execution_history = []
+        self.execution_history = ExecutionHistory()
         self.running_tasks = set()
         self.max_concurrent_tasks = 5
+        self.agent_pools = {}
+        self.pool_settings = {}
+        self.execution_backends = {}
+        self.executors = TaskExecutors()
+        self.result_cache = None
+        self.checkpoints = None
+        self.admission = AdmissionController()
+        self.duration_stats = DurationStats()
+        self.fleet = None
+        self.result_store = None
+        self.tracer = None
+        self.single_flight = SingleFlight()
+    
+    async def __aenter__(self):
+        """Async context manager entry - pre-warms agent pools"""
+        await self.warm_up()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit - tears down pooled agents"""
+        await self.close()
+        
+    def register_agent(self, name: str, agent_class: Any, min_pool_size: int = 0,
+                       max_pool_size: Optional[int] = None, max_idle_time: Optional[float] = 300,
+                       max_uses: Optional[int] = None, execution: Any = None,
+                       max_concurrent: Optional[int] = None, resources: Optional[Dict[str, float]] = None,
+                       pure: Any = None):
+        """Register an agent for use in workflows
         
-    def register_agent(self, name: str, agent_class: Any):
-        """Register an agent for use in workflows"""
-        self.agents[name] = agent_class
+        execution is 'inline', 'thread' or 'process', or a dict mapping action
+        names to one of those (use the key '*' for the agent-wide default).
+        max_concurrent and resources set agent-wide admission limits; use
+        set_agent_limits() for per-action limits. pure is True or a list of
+        actions whose identical in-flight calls may share one execution.
+        """
+        self.agents.register_class(name, agent_class)
+        self._configure_agent(name, min_pool_size, max_pool_size, max_idle_time, max_uses,
+                              execution, max_concurrent, resources, pure)
         print(f"✅ Registered agent: {name}")
     
-    def load_agent_module(self, module_path: str, agent_name: str):
-        """Dynamically load an agent module"""
-        spec = importlib.util.spec_from_file_location(agent_name, module_path)
-        module = importlib.util.module_from_spec(spec)
-        sys.modules[agent_name] = module
-        spec.loader.exec_module(module)
+    def register_lazy_agent(self, name: str, target: str, **options):
+        """Register an agent by 'module:Class' or 'path/file.py:Class' without importing it
         
-        # Find the agent class in the module
-        for item_name in dir(module):
-            item = getattr(module, item_name)
-            if isinstance(item, type) and 'Agent' in item_name:
-                self.register_agent(agent_name, item)
-                break
+        The module is imported the first time a task uses the agent. Accepts the
+        same keyword options as register_agent().
+        """
+        self.agents.register_lazy(name, target)
+        self._configure_agent(name, **options)
+        print(f"✅ Registered agent: {name} (lazy: {target})")
+    
+    def load_agent_manifest(self, manifest_file: str) -> List[str]:
+        """Register every agent listed in a YAML manifest, lazily
+        
+        agents:
+          file_ops: ../automation/file_ops_agent.py:FileOpsAgent
+          devops:
+            class: ../ai-agents/ai_gateway_agent.py:DevOpsAgent
+            max_pool_size: 4
+            max_concurrent: 2
+        """
+        names = []
+        for name, options in AgentRegistry.read_manifest(manifest_file).items():
+            self.register_lazy_agent(name, options.pop('class'), **options)
+            names.append(name)
+        return names
+    
+    def load_agent_entry_points(self, group: str = 'devops_agents') -> List[str]:
+        """Register agents advertised by installed packages under an entry point group"""
+        names = self.agents.load_entry_points(group)
+        for name in names:
+            self._configure_agent(name)
+        return names
+    
+    def _configure_agent(self, name: str, min_pool_size: int = 0, max_pool_size: Optional[int] = None,
+                         max_idle_time: Optional[float] = 300, max_uses: Optional[int] = None,
+                         execution: Any = None, max_concurrent: Optional[int] = None,
+                         resources: Optional[Dict[str, float]] = None, pure: Any = None):
+        """Apply pool, executor, admission and single-flight settings for a registered agent"""
+        if isinstance(execution, dict):
+            execution = {action: validate_backend(backend) for action, backend in execution.items()}
+        elif execution is not None:
+            execution = {'*': validate_backend(execution)}
+        
+        self.execution_backends[name] = execution or {}
+        self.agents.mark_pure(name, pure)
+        if max_concurrent is not None or resources:
+            self.admission.set_limits(name, max_concurrent=max_concurrent, resources=resources)
+        self.pool_settings[name] = {
+            'min_size': min_pool_size,
+            'max_size': max_pool_size,
+            'max_idle_time': max_idle_time,
+            'max_uses': max_uses
+        }
+        
+        # Re-registering replaces the class, so retire the old pool
+        old_pool = self.agent_pools.pop(name, None)
+        if old_pool:
+            self._retire_pool(old_pool)
+    
+    def _retire_pool(self, pool: AgentPool):
+        """Close a pool in the background if a loop is running"""
+        try:
+            asyncio.get_running_loop().create_task(pool.close())
+        except RuntimeError:
+            pass
+    
+    def get_agent_pool(self, name: str) -> AgentPool:
+        """Return the instance pool for an agent, creating it on first use"""
+        pool = self.agent_pools.get(name)
+        if pool is None:
+            if name not in self.agents:
+                raise ValueError(f"Agent '{name}' not registered")
+            settings = dict(self.pool_settings.get(name, {}))
+            settings['max_size'] = settings.get('max_size') or max(self.max_concurrent_tasks, settings.get('min_size', 0), 1)
+            pool = AgentPool(name, self.agents[name], **settings)
+            self.agent_pools[name] = pool
+        return pool
+    
+    def _grow_default_pool(self, name: str, size: int):
+        """Let a pool without an explicit max_pool_size keep up with a wider concurrency limit"""
+        if self.pool_settings.get(name, {}).get('max_size') is None:
+            pool = self.get_agent_pool(name)
+            pool.max_size = max(pool.max_size, size)
+    
+    async def warm_up(self, agent_names: Optional[List[str]] = None):
+        """Pre-create min_pool_size instances for registered agents"""
+        # Agents without a minimum pool are left alone so lazy modules stay unimported
+        if agent_names is None:
+            agent_names = [name for name in self.agents.keys() if self.pool_settings.get(name, {}).get('min_size')]
+        for name in agent_names:
+            await self.get_agent_pool(name).warm_up()
+    
+    async def close(self):
+        """Close every agent pool, running async teardown on pooled agents"""
+        pools = list(self.agent_pools.values())
+        self.agent_pools.clear()
+        for pool in pools:
+            await pool.close()
+        self.executors.shutdown()
+        await self.stop_worker_fleet()
+        if self.result_store and self.result_store.owns_directory:
+            self.result_store.clear()
+    
+    def configure_executors(self, max_threads: Optional[int] = None, max_processes: Optional[int] = None):
+        """Resize the thread and process pools used for non-inline actions"""
+        self.executors.shutdown(wait=False)
+        self.executors = TaskExecutors(max_threads, max_processes)
+    
+    async def start_worker_fleet(self, num_workers: Optional[int] = None, transport: str = 'unix',
+                                 slots_per_worker: int = 1, agents: Optional[List[str]] = None, **kwargs) -> WorkerFleet:
+        """Run tasks for importable agents on worker processes instead of in this one"""
+        await self.stop_worker_fleet()
+        targets = {}
+        for name in (agents if agents is not None else list(self.agents.keys())):
+            target = self.agents.target_for(name)
+            if target:
+                targets[name] = target
+            else:
+                print(f"⚠️ Agent '{name}' is not importable by workers; it stays local")
+        
+        self.fleet = WorkerFleet(num_workers, targets, transport=transport,
+                                 slots_per_worker=slots_per_worker, **kwargs)
+        await self.fleet.start()
+        # The scheduler cap must not starve the fleet of work
+        self.max_concurrent_tasks = max(self.max_concurrent_tasks, self.fleet.total_slots)
+        return self.fleet
+    
+    async def stop_worker_fleet(self):
+        if self.fleet:
+            fleet, self.fleet = self.fleet, None
+            await fleet.stop()
+    
+    def set_agent_limits(self, agent: str, action: Optional[str] = None, max_concurrent: Optional[int] = None,
+                         resources: Optional[Dict[str, float]] = None):
+        """Cap concurrency and declare resource weights (e.g. {'cpu': 2}) for an agent or action"""
+        self.admission.set_limits(agent, action, max_concurrent, resources)
+    
+    def set_resource_budget(self, resource: str, capacity: float):
+        """Limit the total weight of a resource class across running tasks"""
+        self.admission.set_budget(resource, capacity)
+    
+    def enable_result_cache(self, cache_dir: Optional[str] = None, max_memory_entries: int = 1024,
+                            max_disk_bytes: int = 512 * 1024 * 1024, default_ttl: Optional[float] = None):
+        """Memoize task results keyed on agent, action, params and upstream results"""
+        self.result_cache = TaskResultCache(cache_dir, max_memory_entries, max_disk_bytes, default_ttl,
+                                            on_evict=self._release_cached)
+        print(f"🗄️ Result cache enabled{f' at {cache_dir}' if cache_dir else ' (memory only)'}")
+    
+    def enable_result_store(self, directory: Optional[str] = None, inline_threshold: int = 1024 * 1024):
+        """Keep results larger than inline_threshold bytes out of band, passed around by reference"""
+        self.result_store = ResultStore(directory, inline_threshold)
+        print(f"📦 Result store enabled at {self.result_store.directory}")
+    
+    def _release_cached(self, key: str, value: Any):
+        """Let a stored value go once the result cache stops referring to it"""
+        if self.result_store and isinstance(value, ResultRef):
+            self.result_store.release(value, ('cache', key))
+    
+    def _hold_results(self, tasks: List[Task], run_id: Optional[str], checkpoint, failed: bool,
+                      owner: Any = None):
+        """Hand a finished run's stored results to their holders and free the rest"""
+        store = self.result_store
+        refs = [t.result for t in tasks if isinstance(t.result, ResultRef)]
+        if owner is not None:
+            for ref in refs:
+                store.retain(ref, owner)
+        if checkpoint is not None:
+            # Only a run that can still be resumed needs its results to outlive the caller's view
+            store.hold_only(('checkpoint', run_id), refs if failed else [])
+        store.collect(refs)
+    
+    def enable_tracing(self, max_spans: int = 100000) -> TaskTracer:
+        """Record enqueue/admit/start/finish spans for every task (no cost while disabled)"""
+        self.tracer = TaskTracer(max_spans)
+        print("🔭 Task tracing enabled")
+        return self.tracer
+    
+    def export_trace(self, path: str) -> str:
+        """Write recorded spans as Chrome trace-event JSON for Perfetto"""
+        if not self.tracer:
+            raise ValueError("Tracing is not enabled")
+        output = self.tracer.export(path)
+        print(f"🔭 Trace written to {output}")
+        return output
+    
+    def enable_checkpoints(self, directory: str, fsync: bool = False):
+        """Log every task transition so failed runs can be resumed"""
+        self.checkpoints = CheckpointStore(directory, fsync)
+        print(f"💾 Checkpoints enabled at {directory}")
+    
+    def enable_duration_stats(self, path: str, alpha: float = 0.3):
+        """Persist per-(agent, action) duration estimates used for critical-path priority"""
+        previous = self.duration_stats
+        self.duration_stats = DurationStats(path, alpha, previous.default_estimate)
+        for key, entry in previous.stats.items():
+            self.duration_stats.stats.setdefault(key, entry)
+        print(f"⏱️ Duration stats persisted at {path}")
+    
+    def configure_history(self, capacity: int = 100, spill_path: Optional[str] = None):
+        """Bound in-memory history and append full execution records to a JSONL file"""
+        previous = self.execution_history
+        self.execution_history = ExecutionHistory(capacity, spill_path)
+        self.execution_history.counters = previous.counters
+        self.execution_history.latency = previous.latency
+        self.execution_history.recent.extend(previous.recent)
+    
+    def _resolve_backend(self, agent_name: str, action: str, execution: Optional[str],
+                         action_method: Callable) -> str:
+        """Task override, then per-action, then per-agent declaration, then a default"""
+        if execution:
+            return validate_backend(execution)
+        
+        declared = self.execution_backends.get(agent_name, {})
+        backend = declared.get(action) or declared.get('*')
+        if backend:
+            return backend
+        
+        # Coroutines stay on the loop; plain functions must not block it
+        return INLINE if asyncio.iscoroutinefunction(action_method) else THREAD
+    
+    def load_agent_module(self, module_path: str, agent_name: str, class_name: Optional[str] = None, **options):
+        """Dynamically load an agent module
+        
+        With class_name the module is only imported on first use. Without it the
+        module is imported now and must define exactly one *Agent class, or one
+        whose name matches agent_name (e.g. 'devops' -> DevOpsAgent).
+        """
+        if class_name:
+            self.register_lazy_agent(agent_name, f"{module_path}:{class_name}", **options)
+            return
+        
+        module = load_module_from_path(module_path)
+        self.register_agent(agent_name, find_agent_class(module, agent_name), **options)
+    
+    def enable_plan_cache(self, cache_dir: str):
+        """Keep compiled workflow plans on disk so new processes skip YAML parsing"""
+        self.plan_cache = PlanCache(cache_dir)
+        print(f"🗂️ Plan cache enabled at {cache_dir}")
     
     def load_workflow(self, workflow_file: str):
-        """Load workflow definition from YAML file"""
-        with open(workflow_file, 'r') as f:
-            workflow = yaml.safe_load(f)
+        """Load workflow definition from YAML file, compiled and validated once"""
+        plan = self.plan_cache.load(workflow_file)
         
-        workflow_name = workflow['name']
-        self.workflows[workflow_name] = workflow
+        workflow_name = plan.name
+        # The plan keeps its own copy, so edits to the loaded definition are noticed
+        self.workflows[workflow_name] = copy.deepcopy(plan.definition)
+        self.plans[workflow_name] = plan
         print(f"📋 Loaded workflow: {workflow_name}")
         return workflow_name
     
-    async def execute_workflow(self, workflow_name: str, context: Dict = None) -> Dict:
+    def _get_plan(self, workflow_name: str) -> WorkflowPlan:
+        """Compiled plan for a workflow, recompiled whenever its definition has changed"""
+        workflow = self.workflows[workflow_name]
+        plan = self.plans.get(workflow_name)
+        if plan is None or plan.definition != workflow:
+            plan = self.plans[workflow_name] = compile_workflow(workflow)
+        return plan
+    
+    def _build_tasks(self, plan: WorkflowPlan) -> List[Task]:
+        """Create fresh Task objects from a compiled plan"""
+        tasks = plan.instantiate(Task)
+        for task in tasks:
+            self.tasks[task.id] = task
+        return tasks
+    
+    async def execute_workflow(self, workflow_name: str, context: Dict = None, run_id: Optional[str] = None) -> Dict:
         """Execute a complete workflow"""
         if workflow_name not in self.workflows:
             raise ValueError(f"Workflow '{workflow_name}' not found")
         
-        workflow = self.workflows[workflow_name]
+        plan = self._get_plan(workflow_name)
+        workflow = plan.definition
         context = context or {}
         
         print(f"\n🚀 Starting workflow: {workflow_name}")
-        print(f"📝 Description: {workflow.get('description', 'N/A')}")
-        
-        # Create tasks from workflow definition
-        tasks = []
-        for task_def in workflow['tasks']:
-            task = Task(
-                task_id=task_def['id'],
-                agent=task_def['agent'],
-                action=task_def['action'],
-                params=task_def.get('params', {}),
-                dependencies=task_def.get('dependencies', [])
-            )
-            tasks.append(task)
-            self.tasks[task.id] = task
+        print(f"📝 Description: {plan.description}")
+        
+        # Create tasks from the compiled plan
+        tasks = self._build_tasks(plan)
+        
+        checkpoint = None
+        if self.checkpoints:
+            run_id = run_id or f"{workflow_name}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+            checkpoint = self.checkpoints.open(run_id)
+            checkpoint.start(run_id, workflow, context)
+            print(f"💾 Checkpointing run: {run_id}")
+        
+        return await self._run_workflow(plan, tasks, context, run_id, checkpoint)
+    
+    async def resume_workflow(self, run_id: str) -> Dict:
+        """Resume a checkpointed run, re-running only failed, unfinished and downstream tasks"""
+        if not self.checkpoints:
+            raise ValueError("Checkpoints are not enabled")
+        
+        state = self.checkpoints.load(run_id)
+        workflow = state['header']['workflow']
+        context = state['header']['context']
+        plan = compile_workflow(workflow)
+        tasks = self._build_tasks(plan)
+        
+        # Anything not completed, plus everything below it, must run again
+        dependents = {task.id: [] for task in tasks}
+        for task in tasks:
+            for dep in task.dependencies:
+                dependents.setdefault(dep, []).append(task.id)
+        
+        # Streamed items are not checkpointed, so a re-run consumer needs its producer again
+        producers = {t.id: t.stream['from'] for t in tasks if t.stream}
+        
+        # So does a task whose out-of-band result no longer exists
+        def restorable(task_id: str) -> bool:
+            record = state['tasks'].get(task_id, {})
+            if record.get('status') != TaskStatus.COMPLETED.value:
+                return False
+            result = decode_value(record['result'])
+            return not isinstance(result, ResultRef) or result.exists()
+        
+        rerun = set()
+        stack = [t.id for t in tasks if not restorable(t.id)]
+        while stack:
+            task_id = stack.pop()
+            if task_id not in rerun:
+                rerun.add(task_id)
+                stack.extend(dependents.get(task_id, []))
+                if task_id in producers:
+                    stack.append(producers[task_id])
+        
+        for task in tasks:
+            if task.id in rerun:
+                continue
+            record = state['tasks'][task.id]
+            task.status = TaskStatus.COMPLETED
+            task.restored = True
+            task.result = decode_value(record['result'])
+            task.result_hash = record.get('result_hash')
+            task.started_at = datetime.fromisoformat(record['started_at']) if record.get('started_at') else None
+            task.completed_at = datetime.fromisoformat(record['completed_at']) if record.get('completed_at') else None
+        
+        print(f"\n🔁 Resuming workflow: {workflow['name']} (run {run_id})")
+        print(f"♻️ Restored {len(tasks) - len(rerun)} completed tasks, re-running {len(rerun)}")
+        
+        checkpoint = self.checkpoints.open(run_id)
+        checkpoint.resumed(run_id, sorted(rerun))
+        return await self._run_workflow(plan, tasks, context, run_id, checkpoint)
+    
+    async def _run_workflow(self, plan: WorkflowPlan, tasks: List[Task], context: Dict,
+                            run_id: Optional[str], checkpoint=None) -> Dict:
+        """Execute prepared tasks and record the run"""
+        workflow_name = plan.name
+        started_at = datetime.now()
         
         # Execute tasks
-        results = await self._execute_tasks(tasks, context)
+        try:
+            results = await self._execute_tasks(tasks, context, checkpoint, plan)
+        except BaseException:
+            if checkpoint:
+                checkpoint.close()
+            if self.result_store:
+                self._hold_results(tasks, run_id, checkpoint, failed=True)
+            raise
+        
+        failed = any(t.status == TaskStatus.FAILED for t in tasks)
+        if checkpoint:
+            checkpoint.finish('failed' if failed else 'completed')
+        
+        self.duration_stats.save()
         
         # Record execution
+        cache_hits = sum(1 for t in tasks if t.cached)
         execution_record = {
             'workflow': workflow_name,
-            'started_at': datetime.now().isoformat(),
-            'tasks': [t.to_dict() for t in tasks],
-            'results': results
+            'run_id': run_id,
+            'started_at': started_at.isoformat(),
+            'completed_at': datetime.now().isoformat(),
+            'cache_hits': cache_hits,
+            'cache_misses': sum(1 for t in tasks if t.cache is not False and not (t.cached or t.restored))
+                            if self.result_cache else 0,
+            'deduplicated': sum(1 for t in tasks if t.shared)
         }
-        self.execution_history.append(execution_record)
+        self.execution_history.record_execution(execution_record, tasks, results)
         
         print(f"\n✅ Workflow '{workflow_name}' completed")
+        if self.result_store:
+            # Stored results load when the caller indexes them, and are freed when the view is dropped
+            view = ResultView(results)
+            owner = ('run', id(view))
+            self._hold_results(tasks, run_id, checkpoint, failed, owner)
+            weakref.finalize(view, self.result_store.release_owner, owner)
+            return view
         return results
     
-    async def _execute_tasks(self, tasks: List[Task], context: Dict) -> Dict:
+    async def _execute_tasks(self, tasks: List[Task], context: Dict, checkpoint=None,
+                             plan: Optional[WorkflowPlan] = None) -> Dict:
         """Execute tasks with dependency resolution"""
+        # Without a compiled plan the graph is validated here - unknown dependencies and cycles raise
+        # Ready tasks are dispatched longest-remaining-path first
+        scheduler = WorkflowScheduler(
+            tasks, self.max_concurrent_tasks, self.admission,
+            estimate=lambda task: self.duration_stats.estimate(task.agent, task.action),
+            plan=plan
+        )
         results = {}
-        completed_tasks = set()
-        
-        while len(completed_tasks) < len(tasks):
-            # Find tasks ready to run
-            ready_tasks = [
-                task for task in tasks
-                if task.status == TaskStatus.PENDING
-                and all(dep in completed_tasks for dep in task.dependencies)
-                and task.id not in self.running_tasks
-            ]
-            
-            # Limit concurrent tasks
-            ready_tasks = ready_tasks[:self.max_concurrent_tasks - len(self.running_tasks)]
-            
-            if not ready_tasks and not self.running_tasks:
-                # Deadlock or all tasks complete
-                break
-            
-            # Start ready tasks
-            task_futures = []
-            for task in ready_tasks:
-                self.running_tasks.add(task.id)
-                task_futures.append(self._execute_task(task, context, results))
-            
-            # Wait for at least one task to complete
-            if task_futures:
-                done, pending = await asyncio.wait(task_futures, return_when=asyncio.FIRST_COMPLETED)
-                
-                for future in done:
-                    task_id, result = await future
-                    results[task_id] = result
-                    completed_tasks.add(task_id)
-                    self.running_tasks.discard(task_id)
-            else:
-                await asyncio.sleep(0.1)
+        if self.tracer:
+            pending = [t for t in tasks if t.status != TaskStatus.COMPLETED]
+            self.tracer.begin_workflow(plan.name if plan else 'adhoc', pending, self.max_concurrent_tasks)
         
-        return results
+        # Streamed values are never replayed, so both ends of a stream bypass the result cache
+        streams = WorkflowStreams(tasks)
+        for task in tasks:
+            task.stream_reader = streams.reader_for(task.id)
+            task.output_stream = streams.stream_for(task.id)
+            if task.output_stream is not None:
+                task.collect_output = streams.collect[task.id]
+            if task.stream_reader is not None or task.output_stream is not None:
+                task.cache = False
+        
+        async def execute(task: Task) -> tuple:
+            if checkpoint is not None:
+                task.status = TaskStatus.RUNNING
+                checkpoint.record(task)
+            task_id, result = await self._execute_cached_task(task, context, results, scheduler.tasks)
+            if self.result_store and task.status == TaskStatus.COMPLETED:
+                # Large values leave the heap here; everything downstream holds a ref
+                result = task.result = self.result_store.offload(result)
+            if checkpoint is not None:
+                checkpoint.record(task)
+            return task_id, result
+        
+        def on_finish(task_id: str):
+            self.running_tasks.discard(task_id)
+            self.execution_history.record_task(scheduler.tasks[task_id])
+        
+        return await scheduler.run(
+            execute,
+            results=results,
+            on_start=self.running_tasks.add,
+            on_finish=on_finish,
+            tracer=self.tracer
+        )
+    
+    async def _execute_cached_task(self, task: Task, context: Dict, results: Dict,
+                                   tasks_by_id: Dict[str, Task]) -> tuple:
+        """Serve a task from the result cache, or run it and store the result"""
+        if self.result_cache is None:
+            return await self._execute_task(task, context, results)
+        
+        if task.cache is False:
+            task_id, result = await self._execute_task(task, context, results)
+            if task.status == TaskStatus.COMPLETED:
+                # Still fingerprint the output so unchanged downstream tasks can hit
+                task.result_hash = stable_hash(result)
+            return task_id, result
+        
+        # Upstream hashes chain, so a change anywhere invalidates everything downstream
+        dependency_hashes = [tasks_by_id[dep].result_hash for dep in task.dependencies]
+        key = None
+        if all(dependency_hashes):
+            key = self.result_cache.make_key(task.agent, task.action, task.params,
+                                             dependency_hashes, context, task.map, task.reduce)
+            hit, result = self.result_cache.get(key)
+            if hit and isinstance(result, ResultRef) and not result.exists():
+                hit = False     # its stored value was cleared with an earlier result store
+            if hit:
+                if isinstance(result, ResultRef):
+                    self.result_store.retain(result, ('cache', key))
+                task.status = TaskStatus.COMPLETED
+                task.result = result
+                task.result_hash = key
+                task.cached = True
+                task.started_at = task.completed_at = datetime.now()
+                print(f"♻️ Task {task.id} served from cache")
+                return task.id, result
+        
+        task_id, result = await self._execute_task(task, context, results)
+        
+        if key and task.status == TaskStatus.COMPLETED:
+            if self.result_store:
+                # Cache the ref, not the value, so large results do not stay pinned in memory
+                result = task.result = self.result_store.offload(result)
+                if isinstance(result, ResultRef):
+                    self.result_store.retain(result, ('cache', key))
+            ttl = None if task.cache is True else float(task.cache)
+            self.result_cache.put(key, result, ttl)
+            task.result_hash = key
+        return task_id, result
     
     async def _execute_task(self, task: Task, context: Dict, results: Dict) -> tuple:
         """Execute a single task"""
@@ -175,35 +628,40 @@ class AgentOrchestrator:
         
         task.status = TaskStatus.RUNNING
         task.started_at = datetime.now()
+        if self.tracer:
+            self.tracer.mark(task, 'start')
         
         try:
             # Get agent
             if task.agent not in self.agents:
                 raise ValueError(f"Agent '{task.agent}' not registered")
             
-            agent_class = self.agents[task.agent]
-            agent = agent_class()
+            if not hasattr(self.agents[task.agent], task.action):
+                raise AttributeError(f"Agent '{task.agent}' has no action '{task.action}'")
             
             # Prepare parameters with context and previous results
             params = task.params.copy()
+            # Tasks only see the upstream results they read, loaded when indexed
+            view = ResultView(results, task.reads)
             params['_context'] = context
-            params['_results'] = results
+            params['_results'] = view
             
-            # Execute action
-            if hasattr(agent, task.action):
-                action_method = getattr(agent, task.action)
-                if asyncio.iscoroutinefunction(action_method):
-                    result = await action_method(**params)
-                else:
-                    result = action_method(**params)
+            if task.map:
+                result = await self._execute_map(task, params, context, view)
+            elif task.stream_reader is not None or task.output_stream is not None:
+                result = await self._execute_streaming(task, params)
+            elif self.agents.is_pure(task.agent, task.action):
+                result = await self._invoke_shared(task, params, context, results)
             else:
-                raise AttributeError(f"Agent '{task.agent}' has no action '{task.action}'")
+                result = await self._invoke(task, task.agent, task.action, params, task.execution)
             
             task.status = TaskStatus.COMPLETED
             task.result = result
             task.completed_at = datetime.now()
             
             duration = (task.completed_at - task.started_at).total_seconds()
+            if not task.shared:
+                self.duration_stats.record(task.agent, task.action, duration)
             print(f"✅ Task {task.id} completed in {duration:.2f}s")
             
             return task.id, result
@@ -212,31 +670,207 @@ class AgentOrchestrator:
             task.status = TaskStatus.FAILED
             task.error = str(e)
             task.completed_at = datetime.now()
+            # A task that failed before streaming must still release the other end
+            if task.output_stream is not None:
+                await task.output_stream.close(str(e))
+            if task.stream_reader is not None:
+                task.stream_reader.detach()
             
             print(f"❌ Task {task.id} failed: {e}")
             return task.id, {'error': str(e)}
     
+    async def _invoke_shared(self, task: Task, params: Dict, context: Dict, results: Dict) -> Any:
+        """Run a pure action, joining an identical call already in flight if there is one"""
+        # Upstream results are inputs too: tasks fed different values must not merge
+        inputs = {dep: results.get(dep) for dep in sorted(set(task.dependencies) | set(task.reads or ()))}
+        key = stable_hash({'agent': task.agent, 'action': task.action,
+                           'params': task.params, 'context': context, 'inputs': inputs})
+        task.shared = key in self.single_flight
+        if task.shared:
+            print(f"🔗 Task {task.id} joined an identical in-flight execution")
+            if self.tracer:
+                self.tracer.annotate(task, 'shared')
+        _, result = await self.single_flight.run(
+            key, lambda: self._invoke(task, task.agent, task.action, params, task.execution)
+        )
+        return result
+    
+    async def _invoke(self, task: Task, agent_name: str, action: str, params: Dict,
+                      execution: Optional[str] = None) -> Any:
+        """Run one action on the worker fleet or a pooled local agent"""
+        if self.fleet and self.fleet.hosts(agent_name):
+            on_dispatch = None
+            if self.tracer:
+                on_dispatch = lambda worker_id: self.tracer.annotate(task, f"fleet:{worker_id}")
+            return await self.fleet.submit(task.id, agent_name, action, params, on_dispatch)
+        
+        # Borrow a warm agent; errors escaping the block evict it from the pool
+        async with self.get_agent_pool(agent_name).acquire() as agent:
+            method = getattr(agent, action)
+            if inspect.isasyncgenfunction(method):
+                return await pump_generator(method(**params), None, collect=True)
+            backend = self._resolve_backend(agent_name, action, execution, method)
+            if self.tracer:
+                self.tracer.annotate(task, f"local:{backend}")
+            return await self.executors.run(backend, agent, self.agents[agent_name], action, params)
+    
+    async def _execute_streaming(self, task: Task, params: Dict) -> Any:
+        """Run a task at either end of a stream; always local, since iterators cannot cross processes"""
+        stream = task.output_stream
+        if task.stream_reader is not None:
+            params[task.stream['as']] = task.stream_reader
+        
+        try:
+            # A blocked producer may be holding the last pooled instance its consumer needs
+            overflow = task.stream_reader is not None
+            async with self.get_agent_pool(task.agent).acquire(overflow) as agent:
+                method = getattr(agent, task.action)
+                if inspect.isasyncgenfunction(method):
+                    return await pump_generator(method(**params), stream, task.collect_output)
+                if task.stream_reader is not None and not asyncio.iscoroutinefunction(method):
+                    raise TypeError(f"Action '{task.action}' must be async to consume a stream")
+                backend = self._resolve_backend(task.agent, task.action, task.execution, method)
+                result = await self.executors.run(backend, agent, self.agents[task.agent], task.action, params)
+            
+            # A plain producer streams the items of its finished result
+            if stream is not None:
+                for item in (result if isinstance(result, list) else [result]):
+                    await stream.publish(item)
+            return result
+        except Exception as e:
+            if stream is not None:
+                await stream.close(str(e))
+            raise
+        finally:
+            if stream is not None:
+                await stream.close()
+            if task.stream_reader is not None:
+                task.stream_reader.detach()
+    
+    async def _execute_map(self, task: Task, params: Dict, context: Dict, results: ResultView) -> Any:
+        """Fan a task out over its source list, folding results as chunks finish"""
+        spec = task.map
+        source = resolve_source(spec['over'], task.params, context, results)
+        chunks = iter_chunks(source, spec['chunk_size'])
+        
+        async def run_chunk(chunk: Any) -> Any:
+            # Sub-tasks exist only while they hold one of the map's slots
+            chunk_params = dict(params)
+            chunk_params[spec['as']] = chunk
+            return await self._invoke(task, task.agent, task.action, chunk_params, task.execution)
+        
+        reducer = task.reduce if isinstance(task.reduce, str) else 'collect'
+        reduced, count = await run_map(chunks, run_chunk, spec['concurrency'], reducer)
+        print(f"🔀 Task {task.id} mapped over {count} chunks")
+        
+        if not isinstance(task.reduce, dict):
+            return reduced
+        
+        step = task.reduce
+        reduce_params = dict(step.get('params') or {})
+        reduce_params.update({'items': reduced, '_context': context, '_results': results})
+        if step['agent'] not in self.agents:
+            raise ValueError(f"Agent '{step['agent']}' not registered")
+        return await self._invoke(task, step['agent'], step['action'], reduce_params, step.get('execution'))
+    
     async def execute_parallel(self, tasks: List[Dict]) -> List:
-        """Execute multiple independent tasks in parallel"""
+        """Execute multiple independent tasks in parallel, returning results in input order"""
         print(f"\n⚡ Executing {len(tasks)} tasks in parallel")
         
-        task_objects = []
-        for task_def in tasks:
-            task = Task(
-                task_id=task_def.get('id', f"parallel_{len(task_objects)}"),
-                agent=task_def['agent'],
-                action=task_def['action'],
-                params=task_def.get('params', {})
-            )
-            task_objects.append(task)
-        
-        # Execute all tasks concurrently
-        results = await asyncio.gather(
-            *[self._execute_task(task, {}, {}) for task in task_objects],
-            return_exceptions=True
-        )
+        results = [None] * len(tasks)
+        async for index, _, result in self._stream_tasks(tasks, max(len(tasks), 1)):
+            results[index] = result
+        return results
+    
+    async def execute_parallel_stream(self, tasks: Union[Iterable[Dict], AsyncIterable[Dict]],
+                                      max_concurrent: Optional[int] = None) -> AsyncIterator[tuple]:
+        """Run independent tasks with at most max_concurrent in flight, yielding (task_id, result) as each finishes
         
-        return [r[1] for r in results if not isinstance(r, Exception)]
+        Task definitions are pulled from the (async) iterable only as slots free up,
+        so memory stays bounded however many there are. Failed tasks yield
+        {'error': ...} like workflow tasks do.
+        """
+        limit = max_concurrent or self.max_concurrent_tasks
+        stream = self._stream_tasks(tasks, limit)
+        try:
+            async for _, task_id, result in stream:
+                yield task_id, result
+        finally:
+            # Closing this generator early must stop the tasks still in flight
+            await stream.aclose()
+    
+    async def _stream_tasks(self, source: Union[Iterable[Dict], AsyncIterable[Dict]],
+                            limit: int) -> AsyncIterator[tuple]:
+        """Yield (index, task_id, result) for task definitions, keeping at most limit running"""
+        if hasattr(source, '__aiter__'):
+            iterator = source.__aiter__()
+            next_definition = iterator.__anext__
+        else:
+            iterator = iter(source)
+            
+            async def next_definition():
+                try:
+                    return next(iterator)
+                except StopIteration:
+                    raise StopAsyncIteration from None
+        
+        async def run(index: int, task_def: Dict) -> tuple:
+            task_id = task_def.get('id', f"parallel_{index}") if isinstance(task_def, dict) else f"parallel_{index}"
+            try:
+                task = Task(
+                    task_id=task_id,
+                    agent=task_def['agent'],
+                    action=task_def['action'],
+                    params=task_def.get('params', {}),
+                    execution=task_def.get('execution')
+                )
+            except (KeyError, TypeError, AttributeError) as e:
+                return index, task_id, {'error': f"Invalid task definition: {e!r}"}
+            
+            if task.agent in self.agents:
+                self._grow_default_pool(task.agent, limit)
+            if self.tracer:
+                self.tracer.begin_workflow('parallel', [task], limit)
+                self.tracer.mark(task, 'enqueue')
+            _, result = await self._execute_task(task, {}, {})
+            if self.tracer:
+                self.tracer.mark(task, 'finish')
+            return index, task_id, result
+        
+        running = set()
+        fetch = None
+        index = 0
+        exhausted = False
+        try:
+            while True:
+                # Only ask the source for more work while there is a free slot
+                if fetch is None and not exhausted and len(running) < limit:
+                    fetch = asyncio.ensure_future(next_definition())
+                if fetch is None and not running:
+                    return
+                
+                waitables = running | {fetch} if fetch is not None else running
+                done, _ = await asyncio.wait(waitables, return_when=asyncio.FIRST_COMPLETED)
+                
+                if fetch in done:
+                    done.discard(fetch)
+                    try:
+                        task_def = fetch.result()
+                        running.add(asyncio.ensure_future(run(index, task_def)))
+                        index += 1
+                    except StopAsyncIteration:
+                        exhausted = True
+                    fetch = None
+                
+                for future in done:
+                    running.discard(future)
+                    yield future.result()
+        finally:
+            # The consumer stopped early or was cancelled: nothing keeps running unobserved
+            for future in running:
+                future.cancel()
+            if fetch is not None:
+                fetch.cancel()
     
     def create_workflow_template(self, name: str, description: str) -> Dict:
         """Create a workflow template"""
@@ -278,20 +912,20 @@ class AgentOrchestrator:
         if not self.execution_history:
             return {'message': 'No executions recorded'}
         
-        total_tasks = sum(len(exec['tasks']) for exec in self.execution_history)
-        successful_tasks = sum(
-            len([t for t in exec['tasks'] if t['status'] == 'completed'])
-            for exec in self.execution_history
-        )
-        
-        report = {
-            'total_workflows': len(self.execution_history),
-            'total_tasks': total_tasks,
-            'successful_tasks': successful_tasks,
-            'failed_tasks': total_tasks - successful_tasks,
-            'success_rate': (successful_tasks / total_tasks * 100) if total_tasks > 0 else 0,
-            'recent_executions': self.execution_history[-5:]
-        }
+        # Built from running counters, so cost does not grow with history length
+        report = self.execution_history.report()
+        report.update({
+            'agent_pools': {name: pool.get_stats() for name, pool in self.agent_pools.items()},
+            'executors': self.executors.get_stats(),
+            'admission': self.admission.get_stats(),
+            'result_cache': self.result_cache.get_stats() if self.result_cache else None,
+            'plan_cache': self.plan_cache.get_stats(),
+            'result_store': self.result_store.get_stats() if self.result_store else None,
+            'trace': self.tracer.summary() if self.tracer else None,
+            'single_flight': self.single_flight.get_stats(),
+            'worker_fleet': self.fleet.get_stats() if self.fleet else None,
+            'agent_import_seconds': self.agents.import_times()
+        })
         
         return report
 
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Agent Pool - Warm, reusable agent instances for the Agent Orchestrator
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+
+class PooledAgent:
+    """Bookkeeping for one live agent instance"""
+
+    def __init__(self, agent: Any, handle: Any):
+        self.agent = agent          # What tasks call actions on (result of __aenter__)
+        self.handle = handle        # The constructed object that owns __aexit__
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+
+
+class AgentPool:
+    """Pool of instances for a single agent class"""
+
+    def __init__(self, name: str, agent_class: Any, min_size: int = 0, max_size: int = 5,
+                 max_idle_time: Optional[float] = 300, max_uses: Optional[int] = None):
+        if max_size < 1:
+            raise ValueError(f"Agent pool '{name}' needs max_size >= 1")
+        if min_size > max_size:
+            raise ValueError(f"Agent pool '{name}' has min_size > max_size")
+
+        self.name = name
+        self.agent_class = agent_class
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle_time = max_idle_time
+        self.max_uses = max_uses
+
+        self._idle = deque()
+        self._size = 0
+        self._condition = asyncio.Condition()
+        self._closed = False
+        self.stats = {'created': 0, 'reused': 0, 'evicted': 0, 'closed': 0}
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    async def _create(self) -> PooledAgent:
+        """Construct an agent and run its async setup if it has one"""
+        handle = self.agent_class()
+        agent = handle
+        if hasattr(handle, '__aenter__'):
+            agent = await handle.__aenter__()
+            if agent is None:
+                agent = handle
+        self.stats['created'] += 1
+        return PooledAgent(agent, handle)
+
+    async def _destroy(self, pooled: PooledAgent):
+        """Run async teardown; failures here must never break the caller"""
+        if hasattr(pooled.handle, '__aexit__'):
+            try:
+                await pooled.handle.__aexit__(None, None, None)
+            except Exception as e:
+                print(f"⚠️ Error closing {self.name} agent: {e}")
+        self.stats['closed'] += 1
+
+    async def _is_healthy(self, pooled: PooledAgent) -> bool:
+        """Check expiry limits and the agent's own health_check() hook"""
+        now = time.monotonic()
+        if self.max_idle_time is not None and now - pooled.last_used > self.max_idle_time:
+            return False
+        if self.max_uses is not None and pooled.uses >= self.max_uses:
+            return False
+
+        health_check = getattr(pooled.agent, 'health_check', None)
+        if health_check is None:
+            return True
+        try:
+            healthy = health_check()
+            if asyncio.iscoroutine(healthy):
+                healthy = await healthy
+            return bool(healthy)
+        except Exception:
+            return False
+
+    async def warm_up(self):
+        """Pre-create instances up to min_size"""
+        while self._size < self.min_size:
+            self._size += 1
+            try:
+                pooled = await self._create()
+            except Exception:
+                self._size -= 1
+                raise
+            async with self._condition:
+                self._idle.append(pooled)
+                self._condition.notify()
+
+    async def _checkout(self, overflow: bool = False) -> PooledAgent:
+        while True:
+            async with self._condition:
+                if self._closed:
+                    raise RuntimeError(f"Agent pool '{self.name}' is closed")
+                if self._idle:
+                    pooled = self._idle.pop()   # LIFO keeps the warmest instance busy
+                elif self._size < self.max_size or overflow:
+                    self._size += 1
+                    pooled = None
+                else:
+                    await self._condition.wait()
+                    continue
+
+            if pooled is None:
+                try:
+                    return await self._create()
+                except Exception:
+                    await self._discard_slot()
+                    raise
+
+            if await self._is_healthy(pooled):
+                self.stats['reused'] += 1
+                return pooled
+
+            self.stats['evicted'] += 1
+            await self._destroy(pooled)
+            await self._discard_slot()
+
+    async def _discard_slot(self):
+        async with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    async def _checkin(self, pooled: PooledAgent, healthy: bool):
+        pooled.uses += 1
+        pooled.last_used = time.monotonic()
+
+        over_capacity = self._size > self.max_size
+        if not healthy or self._closed or over_capacity or (self.max_uses is not None and pooled.uses >= self.max_uses):
+            if not healthy:
+                self.stats['evicted'] += 1
+            await self._destroy(pooled)
+            await self._discard_slot()
+            return
+
+        async with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    @asynccontextmanager
+    async def acquire(self, overflow: bool = False):
+        """Borrow an agent; an exception escaping the block evicts the instance
+
+        With overflow a full pool creates a temporary extra instance instead of
+        waiting, for callers that may be waited on by the current borrowers.
+        """
+        pooled = await self._checkout(overflow)
+        healthy = True
+        try:
+            yield pooled.agent
+        except BaseException:
+            healthy = False
+            raise
+        finally:
+            await self._checkin(pooled, healthy)
+
+    async def close(self):
+        """Tear down idle instances; busy ones are closed when returned"""
+        async with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+
+        for pooled in idle:
+            await self._destroy(pooled)
+
+    def get_stats(self) -> Dict:
+        return {'size': self._size, 'idle': len(self._idle), **self.stats}
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Agent Registry - Declarative, lazily imported agent classes for the Agent Orchestrator
+"""
+
+import importlib
+import importlib.util
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import yaml
+
+ENTRY_POINT_GROUP = 'devops_agents'
+
+
+def _module_name_for(path: Path) -> str:
+    """Stable, collision-free sys.modules name for a file-based agent module"""
+    slug = re.sub(r'\W', '_', str(path.resolve().with_suffix('')))
+    return f"devops_agents_{slug.strip('_')}"
+
+
+def split_target(target: str) -> tuple:
+    """'module:Class' -> ('module', 'Class'); a bare module or file gives an empty class name"""
+    module_ref, sep, class_name = target.rpartition(':')
+    if not sep or '/' in class_name or class_name.endswith('.py'):
+        return target, ''
+    return module_ref, class_name
+
+
+def load_module_from_path(path: str) -> Any:
+    """Import a module from a file path once; later calls reuse sys.modules"""
+    module_path = Path(path).expanduser()
+    module_name = _module_name_for(module_path)
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+
+    # Agent scripts import their siblings by bare name, as when run from their own directory
+    module_dir = str(module_path.resolve().parent)
+    if module_dir not in sys.path:
+        sys.path.append(module_dir)
+
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load agent module from '{module_path}'")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+    return module
+
+
+def find_agent_class(module: Any, agent_name: str) -> Any:
+    """Pick the agent class a module defines, refusing to guess between several"""
+    candidates = [
+        item for item_name, item in vars(module).items()
+        if isinstance(item, type) and item_name.endswith('Agent')
+        and item.__module__ == module.__name__
+    ]
+    if len(candidates) == 1:
+        return candidates[0]
+
+    wanted = re.sub(r'[^a-z0-9]', '', agent_name.lower())
+    for candidate in candidates:
+        if candidate.__name__.lower() in (wanted, f"{wanted}agent"):
+            return candidate
+
+    if not candidates:
+        raise ValueError(f"No agent class found in module '{module.__name__}'")
+    names = ', '.join(sorted(c.__name__ for c in candidates))
+    raise ValueError(f"Module defines several agents ({names}); specify which class to use for '{agent_name}'")
+
+
+class AgentSpec:
+    """Where an agent class lives and whether it has been imported yet"""
+
+    def __init__(self, name: str, target: Optional[str] = None, agent_class: Any = None,
+                 entry_point: Any = None):
+        self.name = name
+        self.target = target            # "package.module:Class" or "path/to/file.py:Class"
+        self.agent_class = agent_class
+        self.entry_point = entry_point
+        self.import_seconds = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.agent_class is not None
+
+    def resolve(self) -> Any:
+        if self.agent_class is not None:
+            return self.agent_class
+
+        started = time.perf_counter()
+        if self.entry_point is not None:
+            agent_class = self.entry_point.load()
+        else:
+            module_ref, class_name = split_target(self.target)
+            if module_ref.endswith('.py') or '/' in module_ref:
+                module = load_module_from_path(module_ref)
+            else:
+                module = importlib.import_module(module_ref)
+            agent_class = getattr(module, class_name) if class_name else find_agent_class(module, self.name)
+
+        self.import_seconds = time.perf_counter() - started
+        self.agent_class = agent_class
+        return agent_class
+
+
+class AgentRegistry:
+    """Mapping of agent names to classes, importing each module on first use"""
+
+    def __init__(self):
+        self._specs = {}
+        self._pure = {}     # name -> set of action names, or '*' for every action
+
+    def register_class(self, name: str, agent_class: Any):
+        self._specs[name] = AgentSpec(name, agent_class=agent_class)
+
+    def register_lazy(self, name: str, target: str):
+        """Register 'module:Class' or 'path/file.py:Class' without importing it"""
+        self._specs[name] = AgentSpec(name, target=target)
+
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP) -> List[str]:
+        """Register every installed entry point in a group (lazy until used)"""
+        from importlib.metadata import entry_points
+
+        names = []
+        for entry_point in entry_points(group=group):
+            self._specs[entry_point.name] = AgentSpec(entry_point.name, target=entry_point.value,
+                                                      entry_point=entry_point)
+            names.append(entry_point.name)
+        return names
+
+    @staticmethod
+    def read_manifest(manifest_file: str) -> Dict[str, Dict]:
+        """Parse a manifest into {name: options}; relative file targets resolve against it"""
+        manifest_path = Path(manifest_file).expanduser()
+        with open(manifest_path, 'r') as f:
+            manifest = yaml.safe_load(f) or {}
+
+        agents = {}
+        for name, entry in (manifest.get('agents') or {}).items():
+            options = {'class': entry} if isinstance(entry, str) else dict(entry)
+            if 'class' not in options:
+                raise ValueError(f"Manifest entry '{name}' needs a 'class' (module:Class or file.py:Class)")
+            module_ref, class_name = split_target(options['class'])
+            if module_ref.endswith('.py') and not Path(module_ref).is_absolute():
+                module_ref = str(manifest_path.parent / module_ref)
+                options['class'] = f"{module_ref}:{class_name}" if class_name else module_ref
+            agents[name] = options
+        return agents
+
+    def resolve(self, name: str) -> Any:
+        spec = self._specs.get(name)
+        if spec is None:
+            raise KeyError(name)
+        return spec.resolve()
+
+    def target_for(self, name: str) -> Optional[str]:
+        """Import target another process can use to load the same class, if there is one"""
+        spec = self._specs[name]
+        if spec.target:
+            return spec.target
+
+        agent_class = spec.agent_class
+        if '<locals>' in agent_class.__qualname__:
+            return None
+        module = sys.modules.get(agent_class.__module__)
+        module_file = getattr(module, '__file__', None)
+        if agent_class.__module__ == '__main__' or agent_class.__module__.startswith('devops_agents_'):
+            return f"{module_file}:{agent_class.__qualname__}" if module_file else None
+        return f"{agent_class.__module__}:{agent_class.__qualname__}"
+
+    def mark_pure(self, name: str, actions: Any):
+        """Declare actions whose result depends only on their params and context
+
+        True (or '*') marks every action; a list marks those actions; None or
+        False clears the declaration. Identical in-flight calls to a pure
+        action share a single execution.
+        """
+        if actions is True or actions == '*':
+            self._pure[name] = '*'
+        elif actions:
+            self._pure[name] = {actions} if isinstance(actions, str) else set(actions)
+        else:
+            self._pure.pop(name, None)
+
+    def is_pure(self, name: str, action: str) -> bool:
+        actions = self._pure.get(name)
+        return actions == '*' or (actions is not None and action in actions)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._specs and self._specs[name].loaded
+
+    def import_times(self) -> Dict[str, float]:
+        """Seconds spent importing each lazily registered agent that has been used"""
+        return {
+            name: spec.import_seconds
+            for name, spec in self._specs.items()
+            if spec.import_seconds is not None
+        }
+
+    # Mapping protocol so existing `name in self.agents` / `self.agents[name]` code keeps working
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._specs
+
+    def __getitem__(self, name: str) -> Any:
+        return self.resolve(name)
+
+    def __setitem__(self, name: str, agent_class: Any):
+        self.register_class(name, agent_class)
+
+    def __delitem__(self, name: str):
+        del self._specs[name]
+        self._pure.pop(name, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._specs)
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def keys(self):
+        return self._specs.keys()
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.resolve(name) if name in self._specs else default
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Duration Stats - Historical per-(agent, action) task durations for priority scheduling
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class DurationStats:
+    """Exponentially weighted task duration estimates, optionally persisted to JSON"""
+
+    def __init__(self, path: Optional[str] = None, alpha: float = 0.3, default_estimate: float = 1.0):
+        self.path = Path(path).expanduser() if path else None
+        self.alpha = alpha
+        self.default_estimate = default_estimate
+        self.stats = {}     # "agent.action" -> {'ewma', 'count', 'min', 'max'}
+        self._dirty = False
+
+        if self.path and self.path.exists():
+            self.load()
+
+    @staticmethod
+    def _key(agent: str, action: str) -> str:
+        return f"{agent}.{action}"
+
+    def record(self, agent: str, action: str, seconds: float):
+        """Fold one observed duration into the running estimate"""
+        key = self._key(agent, action)
+        entry = self.stats.get(key)
+        if entry is None:
+            self.stats[key] = {'ewma': seconds, 'count': 1, 'min': seconds, 'max': seconds}
+        else:
+            entry['ewma'] += self.alpha * (seconds - entry['ewma'])
+            entry['count'] += 1
+            entry['min'] = min(entry['min'], seconds)
+            entry['max'] = max(entry['max'], seconds)
+        self._dirty = True
+
+    def estimate(self, agent: str, action: str) -> float:
+        """Expected duration; unseen actions get the default estimate"""
+        entry = self.stats.get(self._key(agent, action))
+        return entry['ewma'] if entry else self.default_estimate
+
+    def load(self):
+        """Merge estimates from disk - entries seen more often win"""
+        with open(self.path, 'r') as f:
+            stored = json.load(f)
+        for key, entry in stored.items():
+            current = self.stats.get(key)
+            if current is None or entry.get('count', 0) > current['count']:
+                self.stats[key] = entry
+
+    def save(self):
+        """Atomically persist estimates so later processes start warm"""
+        if not self.path or not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.stats, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def get_stats(self) -> Dict:
+        return {key: dict(entry) for key, entry in self.stats.items()}
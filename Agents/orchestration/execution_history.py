@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Execution History - Bounded recent runs, running totals and latency histograms
+"""
+
+import bisect
+import json
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Bucket upper bounds in seconds: 1ms doubling every two steps up to ~2.3 hours
+BUCKET_BOUNDS = tuple(0.001 * 2 ** (i / 2) for i in range(46))
+
+
+class LatencyHistogram:
+    """Fixed-size log-scale histogram of task durations"""
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound of the bucket holding the p-th percentile (clamped to the observed max)"""
+        if not self.count:
+            return None
+        target = p / 100 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target and bucket_count:
+                bound = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max
+        }
+
+
+class ExecutionHistory:
+    """Ring buffer of run summaries plus O(1) aggregate counters"""
+
+    def __init__(self, capacity: int = 100, spill_path: Optional[str] = None, max_failed_ids: int = 20):
+        self.recent = deque(maxlen=capacity)
+        self.spill_path = Path(spill_path).expanduser() if spill_path else None
+        self.max_failed_ids = max_failed_ids
+        self.counters = {'workflows': 0, 'tasks': 0, 'successful': 0, 'failed': 0, 'cached': 0,
+                         'deduplicated': 0}
+        self.latency = {}    # "agent.action" -> LatencyHistogram
+
+    def __len__(self):
+        return len(self.recent)
+
+    def __iter__(self):
+        return iter(self.recent)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self.recent)[index]
+        return self.recent[index]
+
+    def __bool__(self):
+        return self.counters['workflows'] > 0
+
+    def record_task(self, task: Any):
+        """Fold one finished task into the running totals"""
+        self.counters['tasks'] += 1
+        if task.status.value == 'completed':
+            self.counters['successful'] += 1
+        else:
+            self.counters['failed'] += 1
+
+        if task.cached:
+            self.counters['cached'] += 1
+        elif task.shared:
+            # Waited on another task's execution, so its duration is not an execution latency
+            self.counters['deduplicated'] += 1
+        elif task.started_at and task.completed_at:
+            key = f"{task.agent}.{task.action}"
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = LatencyHistogram()
+            histogram.add((task.completed_at - task.started_at).total_seconds())
+
+    def record_execution(self, summary: Dict, tasks: List[Any], results: Dict):
+        """Keep a compact summary in memory and spill the full record to disk"""
+        self.counters['workflows'] += 1
+
+        failed = [t.id for t in tasks if t.status.value != 'completed']
+        summary = dict(summary)
+        summary.update({
+            'task_count': len(tasks),
+            'failed_count': len(failed),
+            'failed_tasks': failed[:self.max_failed_ids]
+        })
+        self.recent.append(summary)
+
+        if self.spill_path:
+            # Full task dicts and results only ever exist on disk
+            record = {**summary, 'tasks': [t.to_dict() for t in tasks], 'results': results}
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, default=repr) + '\n')
+
+    def report(self, recent: int = 5) -> Dict:
+        """Totals, per-action latency and the latest summaries - independent of history length"""
+        total = self.counters['tasks']
+        return {
+            'total_workflows': self.counters['workflows'],
+            'total_tasks': total,
+            'successful_tasks': self.counters['successful'],
+            'failed_tasks': self.counters['failed'],
+            'cached_tasks': self.counters['cached'],
+            'deduplicated_tasks': self.counters['deduplicated'],
+            'success_rate': (self.counters['successful'] / total * 100) if total > 0 else 0,
+            'latency': {key: histogram.summary() for key, histogram in self.latency.items()},
+            'recent_executions': list(self.recent)[-recent:] if recent else []
+        }
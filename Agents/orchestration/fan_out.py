@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Fan Out - Lazily expanded map tasks and their reduce step
+
+A map task runs its action once per item (or per chunk of items) of a list
+taken from its params, the run context or an upstream result:
+
+    - id: scan
+      agent: file_ops
+      action: scan_file
+      dependencies: [list_files]
+      map:
+        over: results.list_files.files   # or params.<key>, context.<key>, or a literal list
+        as: path                         # param that receives each item / chunk
+        chunk_size: 100
+        concurrency: 8
+      reduce: concat                     # or collect, sum, count, merge, or {agent, action, params}
+"""
+
+import asyncio
+import itertools
+from collections.abc import Mapping
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator
+
+MAP_DEFAULTS = {'as': 'item', 'chunk_size': 1, 'concurrency': 4}
+
+_END = object()
+
+
+def _concat(acc, value):
+    acc.extend(value if isinstance(value, (list, tuple)) else [value])
+    return acc
+
+
+def _merge(acc, value):
+    acc.update(value)
+    return acc
+
+
+def _collect(acc, value):
+    acc.append(value)
+    return acc
+
+
+# name -> (initial value factory, fold); each folds sub-task results as they arrive
+REDUCERS = {
+    'collect': (list, _collect),
+    'concat': (list, _concat),
+    'sum': (int, lambda acc, value: acc + value),
+    'count': (int, lambda acc, value: acc + (len(value) if isinstance(value, (list, tuple, dict)) else 1)),
+    'merge': (dict, _merge),
+}
+
+
+def validate_map_spec(task_id: str, spec: Any, reduce: Any = None) -> Dict:
+    """Normalize a task's map options, filling in defaults"""
+    if not isinstance(spec, dict) or 'over' not in spec:
+        raise ValueError(f"Task '{task_id}': map needs an 'over' list or reference")
+    unknown = set(spec) - set(MAP_DEFAULTS) - {'over'}
+    if unknown:
+        raise ValueError(f"Task '{task_id}': unknown map options {sorted(unknown)}")
+
+    normalized = {**MAP_DEFAULTS, **spec}
+    for key in ('chunk_size', 'concurrency'):
+        if not isinstance(normalized[key], int) or normalized[key] < 1:
+            raise ValueError(f"Task '{task_id}': map {key} must be a positive integer")
+
+    if reduce is not None:
+        if isinstance(reduce, str):
+            if reduce not in REDUCERS:
+                raise ValueError(f"Task '{task_id}': unknown reducer '{reduce}' (use {', '.join(REDUCERS)})")
+        elif not (isinstance(reduce, dict) and 'agent' in reduce and 'action' in reduce):
+            raise ValueError(f"Task '{task_id}': reduce must be a reducer name or {{agent, action}}")
+    return normalized
+
+
+def resolve_source(over: Any, params: Dict, context: Dict, results: Dict) -> Iterable:
+    """Find the iterable a map task runs over"""
+    if not isinstance(over, str):
+        return over
+
+    root, _, path = over.partition('.')
+    scopes = {'params': params, 'context': context, 'results': results}
+    if root not in scopes:
+        raise ValueError(f"Map source '{over}' must start with params., context. or results.")
+
+    value = scopes[root]
+    for key in path.split('.') if path else []:
+        if isinstance(value, Mapping) and key in value:
+            value = value[key]
+        elif isinstance(value, (list, tuple)) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        else:
+            raise ValueError(f"Map source '{over}' not found (missing '{key}')")
+
+    if isinstance(value, (str, bytes, Mapping)) or not hasattr(value, '__iter__'):
+        raise ValueError(f"Map source '{over}' is not a list")
+    return value
+
+
+def iter_chunks(items: Iterable, chunk_size: int) -> Iterator:
+    """Yield single items, or lists of up to chunk_size items, without copying the source"""
+    iterator = iter(items)
+    if chunk_size == 1:
+        yield from iterator
+        return
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+async def run_map(chunks: Iterator, run_one: Callable[[Any], Awaitable[Any]], concurrency: int,
+                  reducer: str = 'collect') -> tuple:
+    """Run run_one over chunks with at most `concurrency` in flight; returns (reduced, count)
+
+    Chunks are pulled from the iterator only when a slot frees up, and results
+    are folded in input order as soon as the ones before them are done, so
+    memory tracks the concurrency window rather than the input size.
+    """
+    initial, fold = REDUCERS[reducer]
+    acc = initial()
+    running = {}        # future -> chunk index
+    finished = {}       # chunk index -> result waiting for earlier chunks
+    next_fold = 0
+    index = 0
+    exhausted = False
+
+    try:
+        while True:
+            while not exhausted and len(running) < concurrency:
+                chunk = next(chunks, _END)
+                if chunk is _END:
+                    exhausted = True
+                    break
+                running[asyncio.ensure_future(run_one(chunk))] = index
+                index += 1
+
+            if not running:
+                return acc, index
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                chunk_index = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    raise RuntimeError(f"Map chunk {chunk_index} failed: {error}") from error
+                finished[chunk_index] = future.result()
+
+            while next_fold in finished:
+                acc = fold(acc, finished.pop(next_fold))
+                next_fold += 1
+    finally:
+        for future in running:
+            future.cancel()
+
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Result Cache - Content-addressed memoization of task results across workflow runs
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_MISSING = object()
+
+
+def stable_hash(value: Any) -> str:
+    """SHA256 of a canonical JSON rendering (sorted keys, repr for exotic types)"""
+    encoded = json.dumps(value, sort_keys=True, separators=(',', ':'), default=repr)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class TaskResultCache:
+    """Two-tier LRU cache: in-memory entries backed by pickles on disk"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_memory_entries: int = 1024,
+                 max_disk_bytes: int = 512 * 1024 * 1024, default_ttl: Optional[float] = None,
+                 on_evict: Optional[Callable[[str, Any], None]] = None):
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else None
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.default_ttl = default_ttl
+        self.on_evict = on_evict       # called with (key, value) when an entry leaves the memory tier
+
+        self._memory = OrderedDict()   # key -> (expires_at, value)
+        self._disk_bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'memory_hits': 0, 'disk_hits': 0,
+                      'stores': 0, 'evictions': 0}
+
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(p.stat().st_size for p in self.cache_dir.glob('*/*.pkl'))
+
+    def make_key(self, agent: str, action: str, params: Dict, dependency_hashes: List[str],
+                 context: Optional[Dict] = None, map_spec: Optional[Dict] = None,
+                 reduce: Any = None) -> str:
+        """Key a task invocation on everything that can change its result"""
+        fields = {
+            'agent': agent,
+            'action': action,
+            'params': params,
+            'dependencies': dependency_hashes,
+            'context': context or {}
+        }
+        if map_spec is not None:
+            # The source (a literal list or a reference) and chunking shape the result; concurrency does not
+            fields['map'] = {k: v for k, v in map_spec.items() if k != 'concurrency'}
+            fields['reduce'] = reduce
+        return stable_hash(fields)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.pkl"
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (hit, value); expired entries count as misses and are dropped"""
+        now = time.time()
+        entry = self._memory.get(key, _MISSING)
+
+        if entry is not _MISSING:
+            expires_at, value = entry
+            if expires_at is None or expires_at > now:
+                self._memory.move_to_end(key)
+                self.stats['hits'] += 1
+                self.stats['memory_hits'] += 1
+                return True, value
+            self._forget(key)
+
+        if self.cache_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, 'rb') as f:
+                    expires_at, value = pickle.load(f)
+            except FileNotFoundError:
+                pass
+            except Exception:
+                self._remove_file(path)
+            else:
+                if expires_at is None or expires_at > now:
+                    os.utime(path)   # mtime doubles as the disk tier's LRU clock
+                    self._remember(key, expires_at, value)
+                    self.stats['hits'] += 1
+                    self.stats['disk_hits'] += 1
+                    return True, value
+                self._remove_file(path)
+
+        self.stats['misses'] += 1
+        return False, None
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a result; ttl falls back to the cache-wide default"""
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires_at = time.time() + ttl if ttl else None
+        self._remember(key, expires_at, value)
+        self.stats['stores'] += 1
+
+        if not self.cache_dir:
+            return
+        try:
+            payload = pickle.dumps((expires_at, value), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return   # Unpicklable results stay memory-only
+
+        path = self._disk_path(key)
+        path.parent.mkdir(exist_ok=True)
+        previous = path.stat().st_size if path.exists() else 0
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        self._disk_bytes += len(payload) - previous
+
+        if self._disk_bytes > self.max_disk_bytes:
+            self._evict_disk()
+
+    def _remember(self, key: str, expires_at: Optional[float], value: Any):
+        previous = self._memory.get(key, _MISSING)
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        if previous is not _MISSING and previous[1] is not value and self.on_evict:
+            self.on_evict(key, previous[1])
+        while len(self._memory) > self.max_memory_entries:
+            self._forget(next(iter(self._memory)))
+            self.stats['evictions'] += 1
+
+    def _forget(self, key: str):
+        _, value = self._memory.pop(key)
+        if self.on_evict:
+            self.on_evict(key, value)
+
+    def _remove_file(self, path: Path):
+        try:
+            size = path.stat().st_size
+            path.unlink()
+            self._disk_bytes -= size
+        except FileNotFoundError:
+            pass
+
+    def _evict_disk(self):
+        """Drop least recently used files until the disk tier is back under its size cap"""
+        entries = []
+        for path in self.cache_dir.glob('*/*.pkl'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        target = self.max_disk_bytes * 0.9
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.stats['evictions'] += 1
+        self._disk_bytes = total
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        while self._memory:
+            self._forget(next(iter(self._memory)))
+        if self.cache_dir:
+            for path in self.cache_dir.glob('*/*.pkl'):
+                path.unlink(missing_ok=True)
+        self._disk_bytes = 0
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'memory_entries': len(self._memory),
+            'disk_bytes': self._disk_bytes
+        }
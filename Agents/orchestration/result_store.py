@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Result Store - Large task results kept out of band and handed around by reference
+
+Results whose pickled size passes a threshold are written once to a file
+(under /dev/shm when available, so it is shared memory in practice) and
+replaced by a small ResultRef. Downstream tasks see a read-only ResultView
+that only loads a value - through mmap - when the task actually indexes it.
+Refs pickle to a few hundred bytes, so they reach fleet workers on the same
+host without copying the value through the socket.
+
+A stored value lives as long as something holds its ref - the results a run
+handed back, a result cache entry, a resumable checkpoint - and its file is
+deleted when the last holder lets go.
+"""
+
+import mmap
+import os
+import pickle
+import shutil
+import tempfile
+import uuid
+from collections import defaultdict
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+_SHARED_MEMORY_DIR = '/dev/shm'
+
+
+class ResultRef:
+    """Handle to a value stored in a ResultStore"""
+
+    __slots__ = ('key', 'path', 'size')
+
+    def __init__(self, key: str, path: str, size: int):
+        self.key = key
+        self.path = path
+        self.size = size
+
+    def __getstate__(self):
+        return (self.key, self.path, self.size)
+
+    def __setstate__(self, state):
+        self.key, self.path, self.size = state
+
+    def __repr__(self):
+        return f"<ResultRef {self.key} {self.size} bytes>"
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def get(self) -> Any:
+        """Materialize the value, unpickling straight from the mapped file"""
+        try:
+            with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return pickle.loads(data)
+        except FileNotFoundError:
+            raise LookupError(f"Stored result {self.key} is gone (was the result store cleared?)") from None
+
+    def describe(self) -> Dict:
+        return {'ref': self.key, 'bytes': self.size}
+
+
+class ResultView(Mapping):
+    """Read-only, lazily loading view of upstream results, optionally limited to some tasks"""
+
+    def __init__(self, results: Dict[str, Any], reads: Optional[Iterable[str]] = None):
+        self._results = results
+        self._reads = frozenset(reads) if reads is not None else None
+        self._loaded = {}
+
+    def _visible(self, key: str) -> bool:
+        return key in self._results and (self._reads is None or key in self._reads)
+
+    def __getitem__(self, key: str) -> Any:
+        if not self._visible(key):
+            if key in self._results:
+                raise KeyError(f"{key} (not listed in this task's reads)")
+            raise KeyError(key)
+        value = self._results[key]
+        if not isinstance(value, ResultRef):
+            return value
+        if key not in self._loaded:
+            self._loaded[key] = value.get()
+        return self._loaded[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in list(self._results) if self._visible(key))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._visible(key)
+
+    def ref(self, key: str) -> Any:
+        """The stored handle (or small inline value) without loading it"""
+        if not self._visible(key):
+            raise KeyError(key)
+        return self._results[key]
+
+    def __reduce__(self):
+        # Only the visible entries travel, and large ones as refs
+        return (ResultView, ({key: self._results[key] for key in self},))
+
+    def __repr__(self):
+        return f"ResultView({', '.join(self)})"
+
+
+class ResultStore:
+    """Out-of-band storage for task results above a size threshold"""
+
+    def __init__(self, directory: Optional[str] = None, inline_threshold: int = 1024 * 1024):
+        self.owns_directory = directory is None
+        if directory is None:
+            base = _SHARED_MEMORY_DIR if os.path.isdir(_SHARED_MEMORY_DIR) else None
+            directory = tempfile.mkdtemp(prefix='agent-results-', dir=base)
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.inline_threshold = inline_threshold
+        self._holders = defaultdict(set)   # ref key -> owners keeping it alive
+        self._held = defaultdict(dict)     # owner -> {ref key: ref}
+        self.stats = {'stored': 0, 'inline': 0, 'bytes': 0, 'discarded': 0}
+
+    def offload(self, value: Any) -> Any:
+        """Return the value itself if it is small, otherwise a ResultRef to a stored copy"""
+        if value is None or isinstance(value, (bool, int, float)) or isinstance(value, ResultRef):
+            return value
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            self.stats['inline'] += 1
+            return value
+        if len(data) < self.inline_threshold:
+            self.stats['inline'] += 1
+            return value
+
+        key = uuid.uuid4().hex
+        path = self.directory / f"{key}.result"
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        self.stats['stored'] += 1
+        self.stats['bytes'] += len(data)
+        return ResultRef(key, str(path), len(data))
+
+    def retain(self, ref: ResultRef, owner: Any):
+        """Keep ref's value until owner releases it"""
+        self._holders[ref.key].add(owner)
+        self._held[owner][ref.key] = ref
+
+    def release(self, ref: ResultRef, owner: Any):
+        """Drop owner's hold on ref; the value is deleted once nobody holds it"""
+        self._held.get(owner, {}).pop(ref.key, None)
+        if not self._held.get(owner, True):
+            del self._held[owner]
+        holders = self._holders.get(ref.key)
+        if holders is None or owner not in holders:
+            return
+        holders.discard(owner)
+        self.collect([ref])
+
+    def release_owner(self, owner: Any):
+        """Drop every hold owner has"""
+        for ref in list(self._held.get(owner, {}).values()):
+            self.release(ref, owner)
+
+    def hold_only(self, owner: Any, refs: Iterable[ResultRef]):
+        """Make refs exactly what owner holds, releasing anything else it had"""
+        refs = {ref.key: ref for ref in refs}
+        for ref in refs.values():
+            self.retain(ref, owner)
+        for key, ref in list(self._held.get(owner, {}).items()):
+            if key not in refs:
+                self.release(ref, owner)
+
+    def collect(self, refs: Iterable[ResultRef]):
+        """Delete the values of refs nobody holds"""
+        for ref in refs:
+            if not self._holders.get(ref.key):
+                self._holders.pop(ref.key, None)
+                self.discard(ref)
+
+    def discard(self, ref: ResultRef):
+        try:
+            os.unlink(ref.path)
+            self.stats['bytes'] -= ref.size
+            self.stats['discarded'] += 1
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        """Delete every stored value; a store that created its own directory removes it"""
+        if self.owns_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        else:
+            for path in self.directory.glob('*.result'):
+                path.unlink(missing_ok=True)
+        self._holders.clear()
+        self._held.clear()
+        self.stats['bytes'] = 0
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'held': len(self._holders), 'directory': str(self.directory)}
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Single Flight - Share one in-flight execution among identical concurrent calls
+
+The first call for a key starts the work; calls with the same key that arrive
+before it finishes await the same future instead of running it again. Once
+the work finishes the key is forgotten, so later calls run afresh - this
+dedupes concurrent work, it is not a cache.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """Key -> running asyncio.Task, shared by every caller with that key"""
+
+    def __init__(self):
+        self._flights = {}
+        self.stats = {'executions': 0, 'deduplicated': 0}
+
+    def __len__(self):
+        return len(self._flights)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._flights
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Tuple[bool, Any]:
+        """Return (shared, result); shared is True when another caller's execution was joined
+
+        Exceptions reach every waiter. A cancelled waiter leaves the execution
+        running for the others.
+        """
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if shared:
+            self.stats['deduplicated'] += 1
+        else:
+            flight = asyncio.ensure_future(factory())
+            self._flights[key] = flight
+            self.stats['executions'] += 1
+            flight.add_done_callback(lambda _: self._forget(key, flight))
+        return shared, await asyncio.shield(flight)
+
+    def _forget(self, key: str, flight: asyncio.Future):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            # Retrieved here so a flight whose waiters were all cancelled does not log
+            flight.exception()
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'in_flight': len(self._flights)}
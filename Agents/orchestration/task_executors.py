@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Task Executors - Inline, thread-pool and process-pool backends for agent actions
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+INLINE = 'inline'
+THREAD = 'thread'
+PROCESS = 'process'
+BACKENDS = (INLINE, THREAD, PROCESS)
+
+
+def validate_backend(backend: str) -> str:
+    """Normalise and check an execution backend name"""
+    backend = str(backend).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown execution backend '{backend}' (expected one of: {', '.join(BACKENDS)})")
+    return backend
+
+
+def run_action_in_process(agent_class: Any, action: str, params: Dict) -> Any:
+    """Entry point inside a worker process - builds a fresh agent and runs one action"""
+    agent = agent_class()
+
+    if not asyncio.iscoroutinefunction(getattr(agent, action)) and not hasattr(agent, '__aenter__'):
+        return getattr(agent, action)(**params)
+
+    async def _run():
+        if hasattr(agent, '__aenter__'):
+            entered = await agent.__aenter__() or agent
+            try:
+                return await _call(getattr(entered, action))
+            finally:
+                await agent.__aexit__(None, None, None)
+        return await _call(getattr(agent, action))
+
+    async def _call(method: Callable):
+        result = method(**params)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+    return asyncio.run(_run())
+
+
+class TaskExecutors:
+    """Sized thread and process pools shared by every workflow of an orchestrator"""
+
+    def __init__(self, max_threads: Optional[int] = None, max_processes: Optional[int] = None):
+        self.max_threads = max_threads or min(32, (os.cpu_count() or 1) + 4)
+        self.max_processes = max_processes or os.cpu_count() or 1
+        self._thread_pool = None
+        self._process_pool = None
+        self.stats = {INLINE: 0, THREAD: 0, PROCESS: 0}
+
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.max_threads,
+                                                   thread_name_prefix='agent-action')
+        return self._thread_pool
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.max_processes)
+        return self._process_pool
+
+    async def run(self, backend: str, agent: Any, agent_class: Any, action: str, params: Dict) -> Any:
+        """Run an action on the given backend and return its result"""
+        method = getattr(agent, action)
+        is_coroutine = asyncio.iscoroutinefunction(method)
+        if is_coroutine and backend == THREAD:
+            raise ValueError(f"Action '{action}' is a coroutine; use 'inline' or 'process' execution")
+        self.stats[backend] += 1
+
+        if backend == PROCESS:
+            # The pooled instance stays here; the worker builds its own copy
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.process_pool, run_action_in_process, agent_class, action, params
+            )
+
+        if is_coroutine:
+            return await method(**params)
+
+        if backend == THREAD:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.thread_pool, partial(method, **params))
+
+        return method(**params)
+
+    def shutdown(self, wait: bool = True):
+        """Stop both pools; they are recreated lazily if used again"""
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=wait)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=wait)
+            self._process_pool = None
+
+    def get_stats(self) -> Dict:
+        return {
+            'max_threads': self.max_threads,
+            'max_processes': self.max_processes,
+            'dispatched': dict(self.stats)
+        }
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Task Streams - Pipe items from async-generator actions into running downstream tasks
+
+A task opts in by naming the upstream task it streams from:
+
+    - id: hash
+      agent: file_ops
+      action: hash_files
+      stream:
+        from: scan        # an action written as an async generator
+        as: files         # param receiving an async iterator over scan's items
+        buffer: 64        # items buffered per consumer before scan is paused
+
+The consumer starts as soon as the producer does. Each consumer has its own
+bounded queue, so the slowest one sets the producer's pace.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+STREAM_DEFAULTS = {'as': 'stream', 'buffer': 64}
+
+_END = object()
+
+
+class _Failure:
+    __slots__ = ('error',)
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+def validate_stream_spec(task_id: str, spec: Any) -> Dict:
+    """Normalize a task's stream options, filling in defaults"""
+    if isinstance(spec, str):
+        spec = {'from': spec}
+    if not isinstance(spec, dict) or 'from' not in spec:
+        raise ValueError(f"Task '{task_id}': stream needs a 'from' task")
+    unknown = set(spec) - set(STREAM_DEFAULTS) - {'from'}
+    if unknown:
+        raise ValueError(f"Task '{task_id}': unknown stream options {sorted(unknown)}")
+
+    normalized = {**STREAM_DEFAULTS, **spec}
+    if not isinstance(normalized['buffer'], int) or normalized['buffer'] < 1:
+        raise ValueError(f"Task '{task_id}': stream buffer must be a positive integer")
+    return normalized
+
+
+class StreamReader:
+    """One consumer's bounded view of a producer's items"""
+
+    def __init__(self, producer_id: str, buffer: int):
+        self.producer_id = producer_id
+        self.queue = asyncio.Queue(maxsize=buffer)
+        self.detached = False
+        self.received = 0
+
+    def __aiter__(self) -> AsyncIterator:
+        return self
+
+    async def __anext__(self) -> Any:
+        if self.detached:
+            raise StopAsyncIteration
+        item = await self.queue.get()
+        if item is _END:
+            self.detached = True
+            raise StopAsyncIteration
+        if isinstance(item, _Failure):
+            self.detached = True
+            raise RuntimeError(f"Upstream task '{self.producer_id}' failed: {item.error}")
+        self.received += 1
+        return item
+
+    def detach(self):
+        """Stop receiving; a producer blocked on this reader is let go"""
+        self.detached = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+
+class ResultStream:
+    """Fan-out channel from one producer task to its streaming consumers"""
+
+    def __init__(self, producer_id: str):
+        self.producer_id = producer_id
+        self.readers = {}     # consumer task id -> StreamReader
+        self.published = 0
+        self.closed = False
+
+    def add_reader(self, consumer_id: str, buffer: int) -> StreamReader:
+        reader = self.readers[consumer_id] = StreamReader(self.producer_id, buffer)
+        return reader
+
+    async def publish(self, item: Any):
+        self.published += 1
+        for reader in self.readers.values():
+            await self._put(reader, item)
+
+    async def close(self, error: Optional[str] = None):
+        if self.closed:
+            return
+        self.closed = True
+        marker = _END if error is None else _Failure(error)
+        for reader in self.readers.values():
+            await self._put(reader, marker)
+
+    @staticmethod
+    async def _put(reader: StreamReader, item: Any):
+        # Consumers that have gone away must not stall the producer (detach drains the queue)
+        if not reader.detached:
+            await reader.queue.put(item)
+
+
+async def pump_generator(generator: Any, stream: Optional[ResultStream], collect: bool) -> Any:
+    """Drive an async generator action, publishing each item; returns its task result"""
+    items = [] if collect else None
+    count = 0
+    try:
+        async for item in generator:
+            count += 1
+            if items is not None:
+                items.append(item)
+            if stream is not None:
+                await stream.publish(item)
+    except Exception as e:
+        if stream is not None:
+            await stream.close(str(e))
+        raise
+    if stream is not None:
+        await stream.close()
+    return items if collect else {'items_streamed': count}
+
+
+class WorkflowStreams:
+    """The streams of one workflow run, created before any task starts"""
+
+    def __init__(self, tasks: List[Any]):
+        self.streams = {}     # producer id -> ResultStream
+        self.sources = {}     # consumer id -> producer id
+        for task in tasks:
+            spec = getattr(task, 'stream', None)
+            if not spec:
+                continue
+            producer_id = spec['from']
+            stream = self.streams.get(producer_id)
+            if stream is None:
+                stream = self.streams[producer_id] = ResultStream(producer_id)
+            stream.add_reader(task.id, spec['buffer'])
+            self.sources[task.id] = producer_id
+
+        # A producer only needs to keep its items if some dependent reads the finished result
+        self.collect = {}
+        for producer_id in self.streams:
+            self.collect[producer_id] = any(
+                producer_id in task.dependencies and self.sources.get(task.id) != producer_id
+                for task in tasks
+            )
+
+    def __bool__(self):
+        return bool(self.streams)
+
+    def stream_for(self, producer_id: str) -> Optional[ResultStream]:
+        return self.streams.get(producer_id)
+
+    def reader_for(self, consumer_id: str) -> Optional[StreamReader]:
+        producer_id = self.sources.get(consumer_id)
+        if producer_id is None:
+            return None
+        return self.streams[producer_id].readers[consumer_id]
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Task Tracing - Per-task lifecycle spans with Chrome trace-event (Perfetto) export
+
+Each task is marked when it becomes ready (enqueue), is admitted by the
+scheduler (admit), starts executing (start) and finishes (finish), all on the
+monotonic perf_counter clock. Tracing is off unless the orchestrator has a
+tracer; every hook is guarded by a single `if tracer` check.
+"""
+
+import json
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+def _percentiles(values: List[float]) -> Dict:
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    return {
+        'count': len(ordered),
+        'mean': sum(ordered) / len(ordered),
+        'p50': ordered[round(last * 0.50)],
+        'p95': ordered[round(last * 0.95)],
+        'p99': ordered[round(last * 0.99)],
+        'max': ordered[-1]
+    }
+
+
+class TaskSpan:
+    """Lifecycle timestamps (perf_counter_ns) and labels for one task execution"""
+
+    __slots__ = ('task_id', 'workflow', 'agent', 'action', 'worker', 'outcome',
+                 'enqueue', 'admit', 'start', 'finish')
+
+    def __init__(self, task_id: str, workflow: str, agent: str, action: str):
+        self.task_id = task_id
+        self.workflow = workflow
+        self.agent = agent
+        self.action = action
+        self.worker = 'local'
+        self.outcome = None
+        self.enqueue = self.admit = self.start = self.finish = None
+
+    @property
+    def queue_wait(self) -> Optional[float]:
+        begin = self.start or self.admit
+        if self.enqueue is None or begin is None:
+            return None
+        return (begin - self.enqueue) / 1e9
+
+    @property
+    def run_time(self) -> Optional[float]:
+        if self.start is None or self.finish is None:
+            return None
+        return (self.finish - self.start) / 1e9
+
+
+class TaskTracer:
+    """Collects task spans and scheduler counters for one or more workflow runs"""
+
+    def __init__(self, max_spans: int = 100000):
+        self.spans = deque(maxlen=max_spans)
+        self.counters = deque(maxlen=max_spans * 2)   # (ns, name, value)
+        self._open = {}                               # task -> TaskSpan
+        self._workflows = {}                          # task -> workflow name, for concurrent runs
+        self.started_ns = time.perf_counter_ns()
+        self.peak_running = 0
+        self.max_concurrent = None
+
+    def begin_workflow(self, workflow: str, tasks: List[Any], max_concurrent: int):
+        for task in tasks:
+            self._workflows[task] = workflow
+        self.max_concurrent = max_concurrent
+
+    def mark(self, task: Any, phase: str):
+        """Record enqueue/admit/start/finish for a task"""
+        now = time.perf_counter_ns()
+        span = self._open.get(task)
+        if span is None:
+            span = self._open[task] = TaskSpan(task.id, self._workflows.get(task), task.agent, task.action)
+        setattr(span, phase, now)
+        if phase == 'finish':
+            span.outcome = 'cached' if getattr(task, 'cached', False) else task.status.value
+            self.spans.append(self._open.pop(task))
+            self._workflows.pop(task, None)
+
+    def annotate(self, task: Any, worker: str):
+        span = self._open.get(task)
+        if span is not None:
+            span.worker = worker
+
+    def counter(self, name: str, value: int):
+        self.counters.append((time.perf_counter_ns(), name, value))
+        if name == 'running' and value > self.peak_running:
+            self.peak_running = value
+
+    def summary(self) -> Dict:
+        """Queue-wait and run-time percentiles, overall and per agent.action"""
+        per_action = {}
+        for span in self.spans:
+            entry = per_action.setdefault(f"{span.agent}.{span.action}", {'queue': [], 'run': []})
+            if span.queue_wait is not None:
+                entry['queue'].append(span.queue_wait)
+            if span.run_time is not None:
+                entry['run'].append(span.run_time)
+
+        return {
+            'spans': len(self.spans),
+            'queue_wait': _percentiles([s.queue_wait for s in self.spans if s.queue_wait is not None]),
+            'run_time': _percentiles([s.run_time for s in self.spans if s.run_time is not None]),
+            'peak_running': self.peak_running,
+            'max_concurrent': self.max_concurrent,
+            'by_action': {
+                key: {'queue_wait': _percentiles(entry['queue']), 'run_time': _percentiles(entry['run']),
+                      'busy_seconds': sum(entry['run'])}
+                for key, entry in sorted(per_action.items(), key=lambda item: -sum(item[1]['run']))
+            }
+        }
+
+    def to_chrome_trace(self) -> Dict:
+        """Trace-event JSON: run spans laid out on non-overlapping lanes, queue waits on their own track"""
+        pid = os.getpid()
+        events = [
+            {'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': 'tasks'}},
+            {'name': 'process_name', 'ph': 'M', 'pid': pid + 1, 'args': {'name': 'queue wait'}},
+        ]
+
+        def micros(ns: int) -> float:
+            return (ns - self.started_ns) / 1000
+
+        lanes = {}          # pid -> list of lane end times
+
+        def lane_for(track: int, begin: int, end: int) -> int:
+            ends = lanes.setdefault(track, [])
+            for lane, lane_end in enumerate(ends):
+                if lane_end <= begin:
+                    ends[lane] = end
+                    return lane
+            ends.append(end)
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': track, 'tid': len(ends) - 1,
+                           'args': {'name': f"lane {len(ends) - 1}"}})
+            return len(ends) - 1
+
+        for span in sorted(self.spans, key=lambda s: s.start or s.enqueue or 0):
+            args = {'workflow': span.workflow, 'agent': span.agent, 'action': span.action,
+                    'worker': span.worker, 'outcome': span.outcome}
+            if span.start is not None and span.finish is not None:
+                events.append({
+                    'name': span.task_id, 'cat': f"{span.agent}.{span.action}", 'ph': 'X',
+                    'ts': micros(span.start), 'dur': (span.finish - span.start) / 1000,
+                    'pid': pid, 'tid': lane_for(pid, span.start, span.finish), 'args': args
+                })
+            begin = span.start or span.admit
+            if span.enqueue is not None and begin is not None and begin > span.enqueue:
+                events.append({
+                    'name': span.task_id, 'cat': 'queue', 'ph': 'X',
+                    'ts': micros(span.enqueue), 'dur': (begin - span.enqueue) / 1000,
+                    'pid': pid + 1, 'tid': lane_for(pid + 1, span.enqueue, begin), 'args': args
+                })
+
+        for ns, name, value in self.counters:
+            events.append({'name': name, 'ph': 'C', 'ts': micros(ns), 'pid': pid, 'args': {name: value}})
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path: str) -> str:
+        """Write a trace viewable at ui.perfetto.dev or chrome://tracing"""
+        output = Path(path).expanduser()
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f)
+        return str(output)
+
+    def clear(self):
+        self.spans.clear()
+        self.counters.clear()
+        self._open.clear()
+        self._workflows.clear()
+        self.peak_running = 0
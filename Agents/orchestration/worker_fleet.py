@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+Worker Fleet - Run orchestrator tasks on long-lived worker processes over local sockets
+
+The coordinator listens on a Unix socket or TCP port and spawns N workers that
+connect back. The handshake is JSON and carries a shared token; after that
+frames are length-prefixed pickles. Workers can also be started by hand, e.g.
+on another box:
+
+    DEVOPS_FLEET_TOKEN=... python3 worker_fleet.py --connect tcp:10.0.0.5:7400
+"""
+
+import argparse
+import asyncio
+import hmac
+import inspect
+import itertools
+import json
+import os
+import pickle
+import secrets
+import struct
+import sys
+import tempfile
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from agent_pool import AgentPool
+from agent_registry import AgentRegistry
+from task_executors import TaskExecutors, INLINE, THREAD
+
+TOKEN_ENV = 'DEVOPS_FLEET_TOKEN'
+_HEADER = struct.Struct('>I')
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    header = await reader.readexactly(_HEADER.size)
+    return await reader.readexactly(_HEADER.unpack(header)[0])
+
+
+def _frame(payload: bytes) -> bytes:
+    return _HEADER.pack(len(payload)) + payload
+
+
+async def _read_json(reader: asyncio.StreamReader) -> Dict:
+    return json.loads(await _read_frame(reader))
+
+
+async def _read_pickle(reader: asyncio.StreamReader) -> Dict:
+    return pickle.loads(await _read_frame(reader))
+
+
+def _json_frame(message: Dict) -> bytes:
+    return _frame(json.dumps(message).encode('utf-8'))
+
+
+def _pickle_frame(message: Dict) -> bytes:
+    return _frame(pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+async def _open_connection(address: str):
+    kind, _, location = address.partition(':')
+    if kind == 'unix':
+        return await asyncio.open_unix_connection(location)
+    if kind == 'tcp':
+        host, _, port = location.rpartition(':')
+        return await asyncio.open_connection(host, int(port))
+    raise ValueError(f"Unsupported fleet address '{address}' (use unix:/path or tcp:host:port)")
+
+
+class FleetJob:
+    """One task invocation travelling through the fleet"""
+
+    __slots__ = ('key', 'task_id', 'agent', 'action', 'params', 'future', 'attempts', 'worker', 'on_dispatch')
+
+    def __init__(self, key: int, task_id: str, agent: str, action: str, params: Dict, future: asyncio.Future,
+                 on_dispatch: Optional[Callable[[str], None]] = None):
+        self.key = key
+        self.task_id = task_id
+        self.agent = agent
+        self.action = action
+        self.params = params
+        self.future = future
+        self.attempts = 0
+        self.worker = None
+        self.on_dispatch = on_dispatch
+
+
+class WorkerHandle:
+    """Coordinator-side view of one connected worker"""
+
+    def __init__(self, worker_id: str, writer: asyncio.StreamWriter, agents: List[str], slots: int, pid: int):
+        self.worker_id = worker_id
+        self.writer = writer
+        self.agents = set(agents)
+        self.slots = max(1, slots)
+        self.pid = pid
+        self.in_flight = {}     # job key -> FleetJob sent to the worker
+        self.queue = deque()    # jobs assigned here but not sent yet (stealable)
+        self.last_seen = time.monotonic()
+        self.alive = True
+        self.completed = 0
+
+    @property
+    def load(self) -> int:
+        return len(self.in_flight) + len(self.queue)
+
+
+class WorkerFleet:
+    """Coordinator that dispatches tasks to worker processes"""
+
+    def __init__(self, num_workers: Optional[int] = None, agent_targets: Optional[Dict[str, str]] = None,
+                 transport: str = 'unix', host: str = '127.0.0.1', port: int = 0,
+                 slots_per_worker: int = 1, heartbeat_interval: float = 1.0, heartbeat_timeout: float = 10.0,
+                 max_attempts: int = 3, respawn: bool = True, startup_timeout: float = 30.0):
+        if transport not in ('unix', 'tcp'):
+            raise ValueError(f"Unknown fleet transport '{transport}'")
+        self.num_workers = num_workers if num_workers is not None else (os.cpu_count() or 1)
+        self.agent_targets = dict(agent_targets or {})
+        self.transport = transport
+        self.host = host
+        self.port = port
+        self.slots_per_worker = slots_per_worker
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        self.respawn = respawn
+        self.startup_timeout = startup_timeout
+
+        self.token = secrets.token_hex(16)
+        self.address = None
+        self.workers = {}         # worker id -> WorkerHandle
+        self.unassigned = deque()
+        self._processes = {}      # worker id -> asyncio.subprocess.Process
+        self._server = None
+        self._socket_dir = None
+        self._monitor = None
+        self._background = set()  # connection handlers and respawns, awaited on stop
+        self._keys = itertools.count()
+        self._worker_ids = itertools.count()
+        self._stopping = False
+        self.stats = {'dispatched': 0, 'completed': 0, 'failed': 0, 'redispatched': 0,
+                      'stolen': 0, 'workers_lost': 0, 'workers_spawned': 0}
+
+    # Lifecycle
+
+    async def start(self):
+        """Listen, spawn workers and wait for them to report ready"""
+        if self.transport == 'unix':
+            self._socket_dir = tempfile.mkdtemp(prefix='agent-fleet-')
+            path = os.path.join(self._socket_dir, 'coordinator.sock')
+            self._server = await asyncio.start_unix_server(self._on_connect, path)
+            self.address = f"unix:{path}"
+        else:
+            self._server = await asyncio.start_server(self._on_connect, self.host, self.port)
+            port = self._server.sockets[0].getsockname()[1]
+            self.address = f"tcp:{self.host}:{port}"
+
+        for _ in range(self.num_workers):
+            await self._spawn_worker()
+
+        deadline = time.monotonic() + self.startup_timeout
+        while len(self.live_workers()) < self.num_workers:
+            if time.monotonic() > deadline:
+                if not self.live_workers():
+                    await self.stop()
+                    raise RuntimeError("No fleet workers connected before the startup timeout")
+                break
+            await asyncio.sleep(0.05)
+
+        self._monitor = asyncio.create_task(self._monitor_heartbeats())
+        print(f"🛰️ Worker fleet ready: {len(self.live_workers())} workers on {self.address}")
+
+    async def _spawn_worker(self):
+        if self._stopping:
+            return
+        worker_id = f"w{next(self._worker_ids)}"
+        env = dict(os.environ, **{TOKEN_ENV: self.token})
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__),
+            '--connect', self.address,
+            '--worker-id', worker_id,
+            '--slots', str(self.slots_per_worker),
+            env=env
+        )
+        self._processes[worker_id] = process
+        self.stats['workers_spawned'] += 1
+
+    async def stop(self):
+        """Shut workers down, failing anything still outstanding"""
+        self._stopping = True
+        if self._monitor:
+            self._monitor.cancel()
+
+        for worker in list(self.workers.values()):
+            if worker.alive:
+                try:
+                    worker.writer.write(_pickle_frame({'type': 'shutdown'}))
+                    await worker.writer.drain()
+                except Exception:
+                    pass
+            self._drop_worker(worker, 'fleet stopped', redispatch=False)
+
+        # Let respawns and connection handlers wind down before reaping processes
+        if self._background:
+            await asyncio.wait(list(self._background), timeout=5)
+
+        for process in list(self._processes.values()):
+            try:
+                await asyncio.wait_for(process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        self._processes.clear()
+
+        while self.unassigned:
+            self._fail(self.unassigned.popleft(), "Worker fleet stopped")
+
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._socket_dir:
+            try:
+                os.unlink(os.path.join(self._socket_dir, 'coordinator.sock'))
+                os.rmdir(self._socket_dir)
+            except OSError:
+                pass
+
+    # Connections
+
+    def _track(self, coro) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def _on_connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._background.add(asyncio.current_task())
+        worker = None
+        try:
+            # Nothing is unpickled until the peer has proven it knows the token
+            hello = await asyncio.wait_for(_read_json(reader), timeout=self.startup_timeout)
+            if hello.get('type') != 'hello' or not hmac.compare_digest(str(hello.get('token', '')), self.token):
+                writer.close()
+                return
+
+            writer.write(_json_frame({
+                'type': 'configure',
+                'agents': self.agent_targets,
+                'sys_path': sys.path,
+                'heartbeat_interval': self.heartbeat_interval
+            }))
+            await writer.drain()
+            ready = await asyncio.wait_for(_read_json(reader), timeout=self.startup_timeout)
+
+            worker_id = hello.get('worker_id') or f"remote-{next(self._worker_ids)}"
+            worker = WorkerHandle(worker_id, writer, ready.get('agents', []),
+                                  hello.get('slots', 1), hello.get('pid', 0))
+            self.workers[worker_id] = worker
+
+            # Jobs that were waiting for a capable worker can go now
+            waiting, self.unassigned = self.unassigned, deque()
+            for job in waiting:
+                self._assign(job)
+            self._pump(worker)
+
+            while True:
+                message = await _read_pickle(reader)
+                worker.last_seen = time.monotonic()
+                if message['type'] == 'result':
+                    self._on_result(worker, message)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.TimeoutError, json.JSONDecodeError):
+            pass
+        finally:
+            if worker is not None:
+                self._drop_worker(worker, 'connection closed')
+            writer.close()
+            self._background.discard(asyncio.current_task())
+
+    def _on_result(self, worker: WorkerHandle, message: Dict):
+        job = worker.in_flight.pop(message['key'], None)
+        if job is None:
+            return   # Late answer for a job already re-dispatched elsewhere
+        worker.completed += 1
+        if not job.future.done():
+            if message['ok']:
+                self.stats['completed'] += 1
+                job.future.set_result(message['result'])
+            else:
+                self._fail(job, message['error'])
+        self._pump(worker)
+
+    async def _monitor_heartbeats(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+            for worker in list(self.workers.values()):
+                if worker.alive and now - worker.last_seen > self.heartbeat_timeout:
+                    self._drop_worker(worker, 'missed heartbeats')
+                    worker.writer.close()
+
+    def _drop_worker(self, worker: WorkerHandle, reason: str, redispatch: bool = True):
+        """Mark a worker dead and move its jobs to the survivors"""
+        if not worker.alive:
+            return
+        worker.alive = False
+        self.workers.pop(worker.worker_id, None)
+        process = self._processes.pop(worker.worker_id, None)
+        if process and reason == 'missed heartbeats':
+            process.kill()   # Hung rather than dead; make sure it stops competing
+
+        orphans = list(worker.in_flight.values()) + list(worker.queue)
+        worker.in_flight.clear()
+        worker.queue.clear()
+
+        if self._stopping or not redispatch:
+            for job in orphans:
+                self._fail(job, f"Worker fleet stopped before task '{job.task_id}' finished")
+            return
+
+        self.stats['workers_lost'] += 1
+        print(f"⚠️ Fleet worker {worker.worker_id} lost ({reason}); re-dispatching {len(orphans)} tasks")
+        for job in orphans:
+            if job.attempts >= self.max_attempts:
+                self._fail(job, f"Task '{job.task_id}' lost with {job.attempts} workers")
+            else:
+                self.stats['redispatched'] += 1
+                self._assign(job)
+
+        if self.respawn:
+            self._track(self._spawn_worker())
+
+    # Dispatch
+
+    def live_workers(self) -> List[WorkerHandle]:
+        return [w for w in self.workers.values() if w.alive]
+
+    def hosts(self, agent: str) -> bool:
+        """True if the fleet was configured with this agent"""
+        return agent in self.agent_targets
+
+    @property
+    def total_slots(self) -> int:
+        return sum(w.slots for w in self.live_workers()) or self.num_workers * self.slots_per_worker
+
+    def submit(self, task_id: str, agent: str, action: str, params: Dict,
+               on_dispatch: Optional[Callable[[str], None]] = None) -> asyncio.Future:
+        """Queue a task on the fleet; the future resolves with its result
+
+        on_dispatch is called with the worker id each time the job is sent out.
+        """
+        future = asyncio.get_running_loop().create_future()
+        job = FleetJob(next(self._keys), task_id, agent, action, params, future, on_dispatch)
+        self._assign(job)
+        return future
+
+    def _assign(self, job: FleetJob):
+        candidates = [w for w in self.live_workers() if job.agent in w.agents]
+        if not candidates:
+            if self._processes or self.respawn:
+                self.unassigned.append(job)   # A worker is starting or will be respawned
+            else:
+                self._fail(job, f"No fleet worker hosts agent '{job.agent}'")
+            return
+
+        worker = min(candidates, key=lambda w: w.load / w.slots)
+        worker.queue.append(job)
+        self._pump(worker)
+
+    def _pump(self, worker: WorkerHandle):
+        """Send queued (or stolen) jobs to a worker until its slots are full"""
+        while worker.alive and len(worker.in_flight) < worker.slots:
+            job = worker.queue.popleft() if worker.queue else self._steal_for(worker)
+            if job is None:
+                return
+            if job.future.done():
+                continue   # Caller gave up (cancelled)
+            try:
+                frame = _pickle_frame({'type': 'run', 'key': job.key, 'task_id': job.task_id,
+                                       'agent': job.agent, 'action': job.action, 'params': job.params})
+            except Exception as e:
+                self._fail(job, f"Task parameters cannot be sent to a worker: {e}")
+                continue
+            job.attempts += 1
+            job.worker = worker
+            worker.in_flight[job.key] = job
+            worker.writer.write(frame)
+            self.stats['dispatched'] += 1
+            if job.on_dispatch:
+                job.on_dispatch(worker.worker_id)
+
+    def _steal_for(self, thief: WorkerHandle) -> Optional[FleetJob]:
+        """Take the newest unsent job this worker can run from the busiest other queue"""
+        victims = sorted((w for w in self.live_workers() if w is not thief and w.queue),
+                         key=lambda w: len(w.queue), reverse=True)
+        for victim in victims:
+            for index in range(len(victim.queue) - 1, -1, -1):
+                job = victim.queue[index]
+                if job.agent in thief.agents:
+                    del victim.queue[index]
+                    self.stats['stolen'] += 1
+                    return job
+        return None
+
+    def _fail(self, job: FleetJob, message: str):
+        if not job.future.done():
+            self.stats['failed'] += 1
+            job.future.set_exception(RuntimeError(message))
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'address': self.address,
+            'workers': {
+                w.worker_id: {'pid': w.pid, 'in_flight': len(w.in_flight), 'queued': len(w.queue),
+                              'completed': w.completed, 'agents': sorted(w.agents)}
+                for w in self.live_workers()
+            },
+            'unassigned': len(self.unassigned)
+        }
+
+
+# Worker side
+
+async def run_worker(address: str, worker_id: Optional[str] = None, slots: int = 1,
+                     token: Optional[str] = None, only_agents: Optional[List[str]] = None):
+    """Connect to a coordinator and run the tasks it sends until told to stop"""
+    reader, writer = await _open_connection(address)
+    writer.write(_json_frame({
+        'type': 'hello',
+        'token': token or os.environ.get(TOKEN_ENV, ''),
+        'worker_id': worker_id,
+        'pid': os.getpid(),
+        'slots': slots
+    }))
+    await writer.drain()
+
+    configure = await _read_json(reader)
+    for path in configure.get('sys_path', []):
+        if path not in sys.path:
+            sys.path.append(path)
+
+    registry = AgentRegistry()
+    for name, target in configure['agents'].items():
+        if only_agents is None or name in only_agents:
+            registry.register_lazy(name, target)
+
+    writer.write(_json_frame({'type': 'ready', 'agents': list(registry.keys())}))
+    await writer.drain()
+
+    pools = {}
+    executors = TaskExecutors(max_threads=max(slots, 1))
+    write_lock = asyncio.Lock()
+    running = set()
+
+    async def send(message: Dict):
+        try:
+            frame = _pickle_frame(message)
+        except Exception as e:
+            frame = _pickle_frame({'type': 'result', 'key': message.get('key'), 'ok': False,
+                                   'error': f"Result cannot be sent back to the coordinator: {e}"})
+        async with write_lock:
+            writer.write(frame)
+            await writer.drain()
+
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(configure.get('heartbeat_interval', 1.0))
+            await send({'type': 'heartbeat', 'running': len(running)})
+
+    async def run_job(message: Dict):
+        try:
+            agent_name = message['agent']
+            pool = pools.get(agent_name)
+            if pool is None:
+                pool = pools[agent_name] = AgentPool(agent_name, registry.resolve(agent_name), max_size=max(slots, 1))
+            async with pool.acquire() as agent:
+                method = getattr(agent, message['action'])
+                if inspect.isasyncgenfunction(method):
+                    result = [item async for item in method(**message['params'])]
+                else:
+                    # Sync work goes to a thread so heartbeats keep flowing
+                    backend = INLINE if asyncio.iscoroutinefunction(method) else THREAD
+                    result = await executors.run(backend, agent, pool.agent_class, message['action'],
+                                                 message['params'])
+            reply = {'type': 'result', 'key': message['key'], 'ok': True, 'result': result}
+        except Exception as e:
+            reply = {'type': 'result', 'key': message['key'], 'ok': False, 'error': str(e)}
+        await send(reply)
+
+    beat = asyncio.create_task(heartbeat())
+    try:
+        while True:
+            message = await _read_pickle(reader)
+            if message['type'] == 'run':
+                job = asyncio.create_task(run_job(message))
+                running.add(job)
+                job.add_done_callback(running.discard)
+            elif message['type'] == 'shutdown':
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        beat.cancel()
+        for job in list(running):
+            job.cancel()
+        for pool in pools.values():
+            await pool.close()
+        executors.shutdown(wait=False)
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent orchestrator fleet worker")
+    parser.add_argument('--connect', required=True, help="unix:/path/to.sock or tcp:host:port")
+    parser.add_argument('--worker-id', default=None)
+    parser.add_argument('--slots', type=int, default=1, help="Tasks this worker runs at once")
+    parser.add_argument('--agents', default=None, help="Comma-separated agents to host (default: all)")
+    args = parser.parse_args()
+
+    only_agents = args.agents.split(',') if args.agents else None
+    asyncio.run(run_worker(args.connect, args.worker_id, args.slots, only_agents=only_agents))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Workflow Checkpoint - Durable per-run log of task state transitions for resume
+"""
+
+import base64
+import json
+import os
+import pickle
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+def encode_value(value: Any) -> Dict:
+    """Store JSON-friendly values as-is and fall back to base64 pickles"""
+    try:
+        json.dumps(value)
+        return {'value': value}
+    except (TypeError, ValueError):
+        pass
+    try:
+        return {'pickle': base64.b64encode(pickle.dumps(value)).decode('ascii')}
+    except Exception:
+        return {'value': repr(value)}
+
+
+def decode_value(encoded: Dict) -> Any:
+    if 'pickle' in encoded:
+        return pickle.loads(base64.b64decode(encoded['pickle']))
+    return encoded.get('value')
+
+
+class CheckpointLog:
+    """Append-only JSONL log for one workflow run"""
+
+    def __init__(self, path: Path, fsync: bool = False):
+        self.path = Path(path)
+        self.fsync = fsync
+        self._file = None
+
+    def _write(self, record: Dict):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        record['ts'] = datetime.now().isoformat()
+        self._file.write(json.dumps(record, default=repr) + '\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def start(self, run_id: str, workflow: Dict, context: Dict):
+        """Write the header needed to rebuild the run later"""
+        self._write({
+            'type': 'run',
+            'run_id': run_id,
+            'workflow': workflow,
+            'context': encode_value(context)
+        })
+
+    def resumed(self, run_id: str, rerun: List[str]):
+        self._write({'type': 'resume', 'run_id': run_id, 'rerun': rerun})
+
+    def record(self, task: Any):
+        """Log a task's current status (and result/error once it has one)"""
+        entry = {
+            'type': 'task',
+            'task': task.id,
+            'status': task.status.value,
+            'error': task.error,
+            'started_at': task.started_at.isoformat() if task.started_at else None,
+            'completed_at': task.completed_at.isoformat() if task.completed_at else None
+        }
+        if task.status.value == 'completed':
+            entry['result'] = encode_value(task.result)
+            entry['result_hash'] = task.result_hash
+        self._write(entry)
+
+    def finish(self, status: str):
+        self._write({'type': 'finish', 'status': status})
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def load(path: Path) -> Dict:
+        """Replay a log into its header and the latest state of every task"""
+        header = None
+        states = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break   # Torn final write from a crash - everything before it is valid
+                if record['type'] == 'run' and header is None:
+                    header = record
+                elif record['type'] == 'task':
+                    states[record['task']] = record
+
+        if header is None:
+            raise ValueError(f"Checkpoint '{path}' has no run header")
+
+        header['context'] = decode_value(header['context'])
+        return {'header': header, 'tasks': states}
+
+
+class CheckpointStore:
+    """Directory of checkpoint logs, one file per run id"""
+
+    def __init__(self, directory: str, fsync: bool = False):
+        self.directory = Path(directory).expanduser()
+        self.fsync = fsync
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, run_id: str) -> Path:
+        return self.directory / f"{run_id}.jsonl"
+
+    def open(self, run_id: str) -> CheckpointLog:
+        return CheckpointLog(self.path_for(run_id), self.fsync)
+
+    def load(self, run_id: str) -> Dict:
+        path = self.path_for(run_id)
+        if not path.exists():
+            raise ValueError(f"No checkpoint found for run '{run_id}'")
+        return CheckpointLog.load(path)
+
+    def list_runs(self) -> List[str]:
+        return sorted(p.stem for p in self.directory.glob('*.jsonl'))
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Workflow Plan - Workflows compiled once into immutable, validated execution plans
+"""
+
+import copy
+import hashlib
+import os
+import pickle
+import sys
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import yaml
+
+from fan_out import validate_map_spec
+from task_streams import validate_stream_spec
+
+# Bump when WorkflowPlan's layout changes so stale disk entries are ignored
+PLAN_FORMAT = 1
+
+# libyaml's loader is much faster when PyYAML was built with it
+_SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class WorkflowPlan:
+    """Immutable compiled form of a workflow definition"""
+
+    __slots__ = ('name', 'description', 'definition', 'task_ids', 'agents', 'actions', 'params',
+                 'options', 'dependencies', 'dependents', 'indegree', 'topological_order', 'index')
+
+    def __init__(self, **fields):
+        for field, value in fields.items():
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("WorkflowPlan is immutable")
+
+    def __getstate__(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __setstate__(self, state):
+        for field, value in state.items():
+            object.__setattr__(self, field, value)
+
+    def __len__(self):
+        return len(self.task_ids)
+
+    def instantiate(self, task_factory: Callable[..., Any]) -> List[Any]:
+        """Create fresh run-state objects for every task, in definition order"""
+        task_ids = self.task_ids
+        return [
+            task_factory(
+                task_id=task_ids[i],
+                agent=self.agents[i],
+                action=self.actions[i],
+                params=copy.deepcopy(self.params[i]),
+                dependencies=[task_ids[d] for d in self.dependencies[i]],
+                **self.options[i]
+            )
+            for i in range(len(task_ids))
+        ]
+
+
+def _check_stream_deadlock(consumer_id: str, producer: int, index: Dict[str, int],
+                           dependencies: List[tuple], dependents: List[list], task_ids: tuple):
+    """A consumer cannot also wait for work that waits for its producer
+
+    The producer blocks once the consumer's buffer is full, so it never
+    finishes if the consumer can only start after something downstream of it.
+    """
+    others = set(dependencies[index[consumer_id]]) - {producer}
+    if not others:
+        return
+    seen = {producer}
+    queue = deque([producer])
+    while queue:
+        for child in dependents[queue.popleft()]:
+            if child in others:
+                raise ValueError(f"Task '{consumer_id}' streams from '{task_ids[producer]}' but also "
+                                 f"depends on '{task_ids[child]}', which waits for it")
+            if child not in seen:
+                seen.add(child)
+                queue.append(child)
+
+
+def _validate_cache_option(task_id: str, value: Any) -> Any:
+    """cache is true, false, or a TTL in seconds; a TTL of 0 disables caching"""
+    if isinstance(value, bool):
+        return value
+    if not isinstance(value, (int, float)) or value < 0 or value != value:
+        raise ValueError(f"Task '{task_id}' has invalid cache {value!r}: "
+                         f"expected true, false or a TTL in seconds")
+    return value if value > 0 else False
+
+
+def compile_workflow(workflow: Dict) -> WorkflowPlan:
+    """Validate a workflow definition and derive its dependency structure"""
+    if not isinstance(workflow, dict) or 'name' not in workflow:
+        raise ValueError("Workflow definition must be a mapping with a 'name'")
+    # The plan owns its definition; later edits to the caller's dict do not leak into it
+    workflow = copy.deepcopy(workflow)
+
+    task_defs = workflow.get('tasks') or []
+    index = {}
+    for position, task_def in enumerate(task_defs):
+        for field in ('id', 'agent', 'action'):
+            if field not in task_def:
+                raise ValueError(f"Task #{position} in workflow '{workflow['name']}' is missing '{field}'")
+        task_id = sys.intern(str(task_def['id']))
+        if task_id in index:
+            raise ValueError(f"Duplicate task id '{task_id}'")
+        index[task_id] = position
+
+    dependencies = []
+    dependents = [[] for _ in task_defs]
+    for position, task_def in enumerate(task_defs):
+        deps = []
+        declared = list(task_def.get('dependencies') or [])
+        if task_def.get('stream'):
+            # Streaming from a task is a dependency on it, released when it starts
+            declared.append(validate_stream_spec(task_def['id'], task_def['stream'])['from'])
+        for dep in dict.fromkeys(declared):
+            if dep not in index:
+                raise ValueError(f"Task '{task_def['id']}' depends on unknown task '{dep}'")
+            deps.append(index[dep])
+            dependents[index[dep]].append(position)
+        dependencies.append(tuple(deps))
+
+    indegree = [len(deps) for deps in dependencies]
+    remaining = list(indegree)
+    queue = deque(i for i, count in enumerate(remaining) if count == 0)
+    order = []
+    while queue:
+        position = queue.popleft()
+        order.append(position)
+        for child in dependents[position]:
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                queue.append(child)
+
+    task_ids = tuple(index)
+    if len(order) < len(task_defs):
+        blocked = sorted(task_ids[i] for i, count in enumerate(remaining) if count > 0)
+        raise ValueError(f"Dependency cycle detected among tasks: {', '.join(blocked)}")
+
+    options = []
+    for task_def in task_defs:
+        task_options = {}
+        for key in ('execution', 'cache', 'reduce'):
+            if key in task_def:
+                task_options[key] = task_def[key]
+        if 'cache' in task_options:
+            task_options['cache'] = _validate_cache_option(task_def['id'], task_options['cache'])
+        if 'reads' in task_def:
+            reads = list(task_def['reads'] or [])
+            upstream = {task_ids[d] for d in dependencies[index[task_def['id']]]}
+            unknown = [read for read in reads if read not in upstream]
+            if unknown:
+                raise ValueError(f"Task '{task_def['id']}' reads {unknown}, which are not its dependencies")
+            task_options['reads'] = tuple(reads)
+        if 'map' in task_def:
+            task_options['map'] = validate_map_spec(task_def['id'], task_def['map'], task_def.get('reduce'))
+        elif 'reduce' in task_def:
+            raise ValueError(f"Task '{task_def['id']}' has a reduce step but no map")
+        if task_def.get('stream'):
+            if 'map' in task_options:
+                raise ValueError(f"Task '{task_def['id']}' cannot both map and stream")
+            task_options['stream'] = validate_stream_spec(task_def['id'], task_def['stream'])
+            producer = task_defs[index[task_options['stream']['from']]]
+            if 'map' in producer:
+                raise ValueError(f"Task '{task_def['id']}' cannot stream from map task '{producer['id']}'")
+            _check_stream_deadlock(task_def['id'], index[producer['id']], index, dependencies, dependents, task_ids)
+        options.append(task_options)
+
+    return WorkflowPlan(
+        name=workflow['name'],
+        description=workflow.get('description', 'N/A'),
+        definition=workflow,
+        task_ids=task_ids,
+        agents=tuple(sys.intern(str(t['agent'])) for t in task_defs),
+        actions=tuple(sys.intern(str(t['action'])) for t in task_defs),
+        params=tuple(t.get('params') or {} for t in task_defs),
+        options=tuple(options),
+        dependencies=tuple(dependencies),
+        dependents=tuple(tuple(children) for children in dependents),
+        indegree=tuple(indegree),
+        topological_order=tuple(order),
+        index=index
+    )
+
+
+class PlanCache:
+    """Compiled plans cached in memory by (path, mtime, size) and on disk by content hash"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else None
+        self._memory = {}    # absolute path -> ((mtime_ns, size), plan)
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'compiled': 0}
+
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def load(self, workflow_file: str) -> WorkflowPlan:
+        """Return the plan for a YAML file, parsing and compiling only when it changed"""
+        path = os.path.abspath(workflow_file)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        cached = self._memory.get(path)
+        if cached and cached[0] == signature:
+            self.stats['memory_hits'] += 1
+            return cached[1]
+
+        with open(path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+
+        plan = self._load_disk(digest)
+        if plan is None:
+            plan = compile_workflow(yaml.load(raw, Loader=_SafeLoader))
+            self.stats['compiled'] += 1
+            self._store_disk(digest, plan)
+        else:
+            self.stats['disk_hits'] += 1
+
+        self._memory[path] = (signature, plan)
+        return plan
+
+    def _disk_path(self, digest: str) -> Path:
+        return self.cache_dir / f"{digest}.v{PLAN_FORMAT}.plan"
+
+    def _load_disk(self, digest: str) -> Optional[WorkflowPlan]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(digest), 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self._disk_path(digest).unlink(missing_ok=True)
+            return None
+
+    def _store_disk(self, digest: str, plan: WorkflowPlan):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(digest)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(plan, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'plans': len(self._memory)}
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Workflow Scheduler - Event-driven DAG execution for the Agent Orchestrator
+"""
+
+import asyncio
+import heapq
+from collections import deque
+from typing import Dict, List, Any, Callable, Awaitable
+
+# Ready-queue priority of streaming consumers: ahead of everything, and exempt from the slot cap
+_CONSUMER = float('-inf')
+
+
+class WorkflowScheduler:
+    """Runs a task graph using in-degree counting and a priority ready queue"""
+
+    def __init__(self, tasks: List[Any], max_concurrent: int = 5, admission: Any = None,
+                 estimate: Callable[[Any], float] = None, plan: Any = None):
+        self.tasks = {}
+        self.dependents = {}
+        self.indegree = {}
+        self.topological_order = []
+        self.ranks = {}
+        self.stream_sources = {}    # consumer id -> producer it streams from
+        self.max_concurrent = max(1, max_concurrent)
+        self.admission = admission
+
+        for task in tasks:
+            if task.id in self.tasks:
+                raise ValueError(f"Duplicate task id '{task.id}'")
+            self.tasks[task.id] = task
+            self.dependents[task.id] = []
+            stream = getattr(task, 'stream', None)
+            if stream:
+                self.stream_sources[task.id] = stream['from']
+
+        if plan is not None:
+            self._adopt_plan(plan)
+        else:
+            self._build_graph()
+        if estimate:
+            self.compute_ranks(estimate)
+
+    def _build_graph(self):
+        """Build adjacency lists and validate dependencies up front"""
+        for task in self.tasks.values():
+            unique_deps = list(dict.fromkeys(task.dependencies))
+            for dep in unique_deps:
+                if dep not in self.tasks:
+                    raise ValueError(f"Task '{task.id}' depends on unknown task '{dep}'")
+                self.dependents[dep].append(task.id)
+            self.indegree[task.id] = len(unique_deps)
+
+        self._check_cycles()
+
+    def _adopt_plan(self, plan: Any):
+        """Reuse the adjacency and order of an already validated WorkflowPlan"""
+        task_ids = plan.task_ids
+        if len(task_ids) != len(self.tasks):
+            raise ValueError(f"Plan '{plan.name}' does not match the tasks being scheduled")
+        for i, task_id in enumerate(task_ids):
+            self.dependents[task_id] = [task_ids[c] for c in plan.dependents[i]]
+            self.indegree[task_id] = plan.indegree[i]
+        self.topological_order = [task_ids[i] for i in plan.topological_order]
+
+    def _check_cycles(self):
+        """Kahn's algorithm - any task left unvisited sits on a cycle"""
+        indegree = dict(self.indegree)
+        queue = deque(task_id for task_id, count in indegree.items() if count == 0)
+        visited = 0
+
+        while queue:
+            task_id = queue.popleft()
+            visited += 1
+            self.topological_order.append(task_id)
+            for child in self.dependents[task_id]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    queue.append(child)
+
+        if visited < len(self.tasks):
+            blocked = sorted(task_id for task_id, count in indegree.items() if count > 0)
+            raise ValueError(f"Dependency cycle detected among tasks: {', '.join(blocked)}")
+
+    def compute_ranks(self, estimate: Callable[[Any], float]):
+        """Upward rank: a task's own estimate plus the longest path below it"""
+        ranks = {}
+        for task_id in reversed(self.topological_order):
+            below = max((ranks[child] for child in self.dependents[task_id]), default=0.0)
+            ranks[task_id] = estimate(self.tasks[task_id]) + below
+        self.ranks = ranks
+        return ranks
+
+    async def run(self, execute: Callable[[Any], Awaitable[tuple]], results: Dict = None,
+                  on_start: Callable[[str], None] = None,
+                  on_finish: Callable[[str], None] = None, tracer: Any = None) -> Dict:
+        """Execute every task, starting each one as soon as its dependencies finish
+
+        Streaming consumers are released when their producer starts rather than
+        when it finishes. A tracer, if given, sees enqueue/admit/finish marks.
+        """
+        results = results if results is not None else {}
+        indegree = dict(self.indegree)
+        running = {}
+        streaming = self.stream_sources
+
+        # Tasks restored from a checkpoint count as already finished
+        for task_id, task in self.tasks.items():
+            if task.status.value == 'completed':
+                results[task_id] = task.result
+                for child in self.dependents[task_id]:
+                    indegree[child] -= 1
+                    if streaming.get(child) == task_id:
+                        raise ValueError(f"Task '{child}' streams from '{task_id}', which must run again")
+
+        # Highest upward rank first; ties keep the order tasks became ready
+        ranks = self.ranks
+        sequence = 0
+        ready = []
+        for task_id, task in self.tasks.items():
+            if indegree[task_id] == 0 and task.status.value != 'completed':
+                ready.append((-ranks.get(task_id, 0.0), sequence, task_id))
+                sequence += 1
+        heapq.heapify(ready)
+        if tracer:
+            for entry in ready:
+                tracer.mark(self.tasks[entry[2]], 'enqueue')
+
+        # Tasks refused by admission control wait per (agent, action), in priority order.
+        # Only the head of a parked kind is retried, and only once capacity it needs
+        # comes back, so a capped action costs O(log n) per completion, not a rescan.
+        parked = {}       # kind -> heap of entries
+        constraints = {}  # kind -> admission keys and resources that can block it
+        retrying = set()  # parked kinds whose head is back in the ready queue
+
+        def enqueue(entry: tuple):
+            task = self.tasks[entry[2]]
+            kind = (task.agent, task.action)
+            if kind in parked and entry[0] != _CONSUMER:
+                heapq.heappush(parked[kind], entry)
+            else:
+                heapq.heappush(ready, entry)
+
+        def unpark(freed: frozenset):
+            for kind, entries in parked.items():
+                if kind not in retrying and not constraints[kind].isdisjoint(freed):
+                    retrying.add(kind)
+                    heapq.heappush(ready, heapq.heappop(entries))
+
+        # Capacity can also come back from tasks of other workflows, at any moment
+        released = asyncio.Event()
+
+        def on_release(freed: frozenset):
+            if parked:
+                unpark(freed)
+            released.set()
+
+        def slots_free() -> bool:
+            # With an admission controller the cap covers every workflow it serves
+            used = self.admission.running if self.admission else len(running)
+            return used < self.max_concurrent
+
+        if self.admission:
+            self.admission.add_listener(on_release)
+        try:
+            while ready or running or parked:
+                # Fill every free slot before waiting
+                while ready and (slots_free() or ready[0][0] == _CONSUMER):
+                    entry = heapq.heappop(ready)
+                    task_id = entry[2]
+                    task = self.tasks[task_id]
+                    # A consumer must never wait for a slot its blocked producer is holding
+                    if self.admission and task_id not in streaming:
+                        kind = (task.agent, task.action)
+                        if kind in parked and kind not in retrying:
+                            heapq.heappush(parked[kind], entry)
+                            continue
+                        if not self.admission.try_admit(task):
+                            if kind not in parked:
+                                parked[kind] = []
+                                constraints[kind] = self.admission.constraints(task)
+                            heapq.heappush(parked[kind], entry)
+                            retrying.discard(kind)
+                            continue
+                        if kind in retrying:
+                            # Admitted: the next in line may fit as well
+                            if parked[kind]:
+                                heapq.heappush(ready, heapq.heappop(parked[kind]))
+                            else:
+                                del parked[kind], constraints[kind]
+                                retrying.discard(kind)
+                    if self.admission:
+                        self.admission.started(task)
+                    if on_start:
+                        on_start(task_id)
+                    if tracer:
+                        tracer.mark(task, 'admit')
+                    future = asyncio.ensure_future(execute(task))
+                    running[future] = task_id
+                    if tracer:
+                        tracer.counter('running', len(running))
+
+                    for child in self.dependents[task_id]:
+                        if streaming.get(child) == task_id:
+                            indegree[child] -= 1
+                            if indegree[child] == 0:
+                                enqueue((_CONSUMER, sequence, child))
+                                sequence += 1
+                                if tracer:
+                                    tracer.mark(self.tasks[child], 'enqueue')
+
+                if ready and slots_free():
+                    continue      # a release while filling put a parked task back in line
+
+                capacity = None
+                waitables = set(running)
+                if parked or ready:
+                    # Waiting on capacity held by tasks of other workflows
+                    released.clear()
+                    capacity = asyncio.ensure_future(released.wait())
+                    waitables.add(capacity)
+
+                done, _ = await asyncio.wait(waitables, return_when=asyncio.FIRST_COMPLETED)
+                if capacity is not None:
+                    capacity.cancel()
+                    done.discard(capacity)
+
+                for future in done:
+                    task_id = running.pop(future)
+                    if self.admission:
+                        self.admission.release(self.tasks[task_id])
+                    _, result = future.result()
+                    results[task_id] = result
+                    if tracer:
+                        tracer.mark(self.tasks[task_id], 'finish')
+                        tracer.counter('running', len(running))
+                    if on_finish:
+                        on_finish(task_id)
+
+                    # Release dependents in O(out-degree)
+                    for child in self.dependents[task_id]:
+                        if streaming.get(child) == task_id:
+                            continue
+                        indegree[child] -= 1
+                        if indegree[child] == 0:
+                            priority = _CONSUMER if child in streaming else -ranks.get(child, 0.0)
+                            enqueue((priority, sequence, child))
+                            sequence += 1
+                            if tracer:
+                                tracer.mark(self.tasks[child], 'enqueue')
+
+                if tracer:
+                    tracer.counter('ready', len(ready) + sum(len(entries) for entries in parked.values()))
+        finally:
+            if self.admission:
+                self.admission.remove_listener(on_release)
+            for future, task_id in running.items():
+                future.cancel()
+                if self.admission:
+                    # Slots and capacity are shared with other workflows; hand them back
+                    self.admission.release(self.tasks[task_id])
+
+        return results
@@ -0,0 +1,11 @@
+"""Put the orchestration and gateway modules on the path, as the launch scripts do"""
+
+import os
+import sys
+
+AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for subdir in ('orchestration', 'ai-agents'):
+    path = os.path.join(AGENTS_DIR, subdir)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,23 @@
+"""Agents loaded by fleet workers in test_worker_fleet.py"""
+
+import os
+import time
+
+
+class CountingAgent:
+    def square(self, n: int = 0, **kwargs):
+        time.sleep(0.05)
+        return {'pid': os.getpid(), 'n': n * n}
+
+    def crash_once(self, marker: str, **kwargs):
+        """Kill the worker the first time, succeed on whichever worker retries it"""
+        if not os.path.exists(marker):
+            open(marker, 'w').close()
+            os._exit(1)
+        return {'pid': os.getpid()}
+
+    def crash(self, **kwargs):
+        os._exit(1)
+
+    def boom(self, **kwargs):
+        raise ValueError("bad input")
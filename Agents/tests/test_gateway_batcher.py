@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from ai_gateway_agent import AIGatewayAgent
+from gateway_batcher import RequestBatcher
+from gateway_limiter import GatewayLimiter
+from gateway_session import gateway_sessions
+from local_gateway import LocalGateway
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv('AI_GATEWAY_API_KEY', 'test-key')
+
+
+@pytest_asyncio.fixture
+async def start_gateway():
+    gateways = []
+
+    async def start(**options):
+        gateway = LocalGateway(latency=0.02, overhead=0.01, **options)
+        gateways.append(gateway)
+        return gateway, await gateway.start()
+
+    yield start
+    for gateway in gateways:
+        await gateway.stop()
+    await gateway_sessions.close()
+
+
+async def ask_concurrently(url: str, batcher: RequestBatcher, count: int):
+    async def ask(i: int) -> str:
+        async with AIGatewayAgent() as agent:
+            agent.base_url = url
+            agent.batcher = batcher
+            return await agent.chat(f"question {i}", use_cache=False, history=False)
+    return await asyncio.gather(*(ask(i) for i in range(count)))
+
+
+def make_batcher(**settings) -> RequestBatcher:
+    return RequestBatcher(limiter=GatewayLimiter(), **settings)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_batches(start_gateway):
+    gateway, url = await start_gateway()
+    batcher = make_batcher(enabled=True, window=0.05, max_batch=8)
+
+    replies = await ask_concurrently(url, batcher, 20)
+
+    assert [reply.endswith(f"question {i}") for i, reply in enumerate(replies)] == [True] * 20
+    assert gateway.stats['completions'] == 20
+    assert gateway.stats['http_requests'] < 20
+    assert gateway.stats['largest_batch'] <= 8
+    assert batcher.stats['batched_requests'] == 20
+    assert batcher.stats['requeued'] == 0
+
+
+@pytest.mark.asyncio
+async def test_gateway_without_batch_endpoint_gets_pipelined_requests(start_gateway):
+    gateway, url = await start_gateway(batch=False)
+    batcher = make_batcher(enabled=True, window=0.05, max_batch=8)
+
+    replies = await ask_concurrently(url, batcher, 10)
+
+    assert [reply.endswith(f"question {i}") for i, reply in enumerate(replies)] == [True] * 10
+    assert gateway.stats['batches'] == 0
+    assert gateway.stats['completions'] == 10
+    assert batcher.stats['pipelined_requests'] == 10
+    assert batcher.get_stats()['batch_endpoints'] == {url: False}
+
+
+@pytest.mark.asyncio
+async def test_disabled_batcher_sends_one_request_each(start_gateway):
+    gateway, url = await start_gateway()
+    batcher = make_batcher(enabled=False)
+
+    replies = await ask_concurrently(url, batcher, 5)
+
+    assert len(replies) == 5
+    assert gateway.stats['http_requests'] == 5
+    assert gateway.stats['batches'] == 0
+    assert batcher.stats['requests'] == 0
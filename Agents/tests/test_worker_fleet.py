@@ -0,0 +1,83 @@
+import asyncio
+import os
+
+import pytest
+import pytest_asyncio
+
+from agent_orchestrator import AgentOrchestrator
+from fleet_agents import CountingAgent
+from worker_fleet import WorkerFleet
+
+TARGETS = {'count': 'fleet_agents:CountingAgent'}
+
+
+@pytest_asyncio.fixture
+async def fleet():
+    fleet = WorkerFleet(2, TARGETS, heartbeat_interval=0.2, max_attempts=2)
+    await fleet.start()
+    yield fleet
+    await fleet.stop()
+
+
+@pytest.mark.asyncio
+async def test_tasks_are_spread_over_the_workers(fleet):
+    futures = [fleet.submit(f't{i}', 'count', 'square', {'n': i}) for i in range(8)]
+    results = await asyncio.gather(*futures)
+
+    assert [r['n'] for r in results] == [i * i for i in range(8)]
+    assert len({r['pid'] for r in results}) == 2
+    assert os.getpid() not in {r['pid'] for r in results}
+    assert fleet.stats['completed'] == 8
+
+
+@pytest.mark.asyncio
+async def test_action_errors_fail_only_their_task(fleet):
+    bad = fleet.submit('bad', 'count', 'boom', {})
+    good = fleet.submit('good', 'count', 'square', {'n': 3})
+
+    with pytest.raises(RuntimeError, match="bad input"):
+        await bad
+    assert (await good)['n'] == 9
+    assert fleet.stats['workers_lost'] == 0
+
+
+@pytest.mark.asyncio
+async def test_task_on_a_lost_worker_is_redispatched(fleet, tmp_path):
+    marker = str(tmp_path / 'crashed')
+    crashing = fleet.submit('crash', 'count', 'crash_once', {'marker': marker})
+    others = [fleet.submit(f't{i}', 'count', 'square', {'n': i}) for i in range(4)]
+
+    result = await asyncio.wait_for(crashing, 30)
+
+    assert os.path.exists(marker)
+    assert result['pid'] != os.getpid()
+    assert [r['n'] for r in await asyncio.gather(*others)] == [0, 1, 4, 9]
+    assert fleet.stats['workers_lost'] >= 1
+    assert fleet.stats['redispatched'] >= 1
+
+
+@pytest.mark.asyncio
+async def test_task_that_keeps_killing_workers_gives_up(fleet):
+    with pytest.raises(RuntimeError, match="lost with 2 workers"):
+        await asyncio.wait_for(fleet.submit('crash', 'count', 'crash', {}), 30)
+
+    # Lost workers are respawned, so the fleet keeps serving
+    assert (await asyncio.wait_for(fleet.submit('after', 'count', 'square', {'n': 2}), 30))['n'] == 4
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_runs_workflow_tasks_on_the_fleet():
+    orchestrator = AgentOrchestrator()
+    orchestrator.register_agent('count', CountingAgent)
+    orchestrator.workflows['w'] = {'name': 'w', 'tasks': [
+        {'id': f's{i}', 'agent': 'count', 'action': 'square', 'params': {'n': i}} for i in range(4)
+    ]}
+    try:
+        fleet = await orchestrator.start_worker_fleet(2)
+        results = await orchestrator.execute_workflow('w')
+    finally:
+        await orchestrator.close()
+
+    assert [results[f's{i}']['n'] for i in range(4)] == [0, 1, 4, 9]
+    assert os.getpid() not in {results[f's{i}']['pid'] for i in range(4)}
+    assert fleet.stats['dispatched'] == 4
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from agent_orchestrator import AgentOrchestrator, Task, TaskStatus
+from workflow_plan import compile_workflow
+from workflow_scheduler import WorkflowScheduler
+
+
+def make_tasks(graph):
+    return [Task(task_id, 'agent', 'action', dependencies=list(deps)) for task_id, deps in graph.items()]
+
+
+def workflow(*tasks):
+    return {'name': 'w', 'tasks': [
+        {'id': task_id, 'agent': 'a', 'action': 'run', 'dependencies': list(deps)} for task_id, deps in tasks
+    ]}
+
+
+class RecordingAgent:
+    active = 0
+    peak = 0
+
+    async def run(self, _context=None, _results=None):
+        cls = type(self)
+        cls.active += 1
+        cls.peak = max(cls.peak, cls.active)
+        await asyncio.sleep(0.01)
+        cls.active -= 1
+        # Upstream results present when this task started
+        return sorted(_results)
+
+
+@pytest.fixture
+def recording():
+    RecordingAgent.active = RecordingAgent.peak = 0
+    return RecordingAgent
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError, match="Task 'b' depends on unknown task 'missing'"):
+        WorkflowScheduler(make_tasks({'a': [], 'b': ['missing']}))
+
+
+def test_cycle_is_rejected_with_the_blocked_tasks():
+    with pytest.raises(ValueError, match="Dependency cycle detected among tasks: b, c, d"):
+        WorkflowScheduler(make_tasks({'a': [], 'b': ['a', 'd'], 'c': ['b'], 'd': ['c']}))
+
+
+def test_self_dependency_is_a_cycle():
+    with pytest.raises(ValueError, match="cycle"):
+        WorkflowScheduler(make_tasks({'a': ['a']}))
+
+
+def test_duplicate_task_id_is_rejected():
+    with pytest.raises(ValueError, match="Duplicate task id 'a'"):
+        WorkflowScheduler(make_tasks({'a': []}) + make_tasks({'a': []}))
+
+
+def test_compile_rejects_the_same_graph_errors():
+    with pytest.raises(ValueError, match="depends on unknown task 'x'"):
+        compile_workflow(workflow(('a', ['x'])))
+    with pytest.raises(ValueError, match="Dependency cycle detected among tasks: a, b"):
+        compile_workflow(workflow(('a', ['b']), ('b', ['a'])))
+
+
+@pytest.mark.parametrize('value', ['1h', -5, None])
+def test_compile_rejects_invalid_cache_values(value):
+    definition = workflow(('a', []))
+    definition['tasks'][0]['cache'] = value
+    with pytest.raises(ValueError, match="invalid cache"):
+        compile_workflow(definition)
+
+
+def test_cache_ttl_of_zero_disables_caching():
+    definition = workflow(('a', []))
+    definition['tasks'][0]['cache'] = 0
+    assert compile_workflow(definition).options[0]['cache'] is False
+
+
+def test_ranks_follow_the_longest_remaining_path():
+    scheduler = WorkflowScheduler(make_tasks({'a': [], 'b': ['a'], 'c': ['b'], 'd': []}),
+                                  estimate=lambda task: 1.0)
+    assert scheduler.ranks['a'] == 3.0
+    assert scheduler.ranks['d'] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_workflow_runs_dependencies_first_within_the_concurrency_cap(recording):
+    orchestrator = AgentOrchestrator()
+    orchestrator.register_agent('a', recording)
+    orchestrator.max_concurrent_tasks = 2
+    orchestrator.workflows['w'] = workflow(
+        ('fetch1', []), ('fetch2', []), ('fetch3', []),
+        ('merge', ['fetch1', 'fetch2', 'fetch3']), ('report', ['merge'])
+    )
+    try:
+        results = await orchestrator.execute_workflow('w')
+    finally:
+        await orchestrator.close()
+
+    assert recording.peak == 2
+    assert results['merge'] == ['fetch1', 'fetch2', 'fetch3']
+    assert 'merge' in results['report']
+    assert all(task.status == TaskStatus.COMPLETED for task in orchestrator.tasks.values())